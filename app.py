@@ -1,17 +1,32 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, session, flash, send_from_directory, send_file, jsonify
 from functools import wraps
+import click
+import mimetypes
 import os
 from database import init_db, close_db
 from controllers.auth_controller import AuthController
 from controllers.event_controller import EventController
 from controllers.photo_controller import PhotoController
+from controllers.upload_controller import UploadController
+from controllers.follow_controller import FollowController
+from controllers.like_controller import LikeController
+from controllers.comment_controller import CommentController
 from models.event import Event
 from models.photo import Photo
+from archive import schedule_archive_build
+from popularity import schedule_popularity_refresh
+from pagination import paginate, decode_cursor
+from listing_cache import cached_listing, invalidate_listings
+from assets import STATIC_DIST_DIRNAME, STATIC_MAX_AGE, dist_folder, load_manifest, preferred_encoding
 
 app = Flask(__name__, template_folder='views', static_folder='static')
 app.secret_key = os.getenv('SECRET_KEY', 'memo-secret-key-change-in-production')
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+app.config['PHOTO_CACHE_MAX_AGE'] = int(os.getenv('PHOTO_CACHE_MAX_AGE', 365 * 24 * 60 * 60))
+app.config['EVENTS_PAGE_SIZE'] = int(os.getenv('EVENTS_PAGE_SIZE', 20))
+app.config['COMMENTS_PAGE_SIZE'] = int(os.getenv('COMMENTS_PAGE_SIZE', 20))
+app.config['STATIC_FINGERPRINT'] = os.getenv('STATIC_FINGERPRINT', '1') == '1'
 
 _db_initialized = False
 
@@ -19,14 +34,39 @@ _db_initialized = False
 def close_db_connection(error):
     close_db()
 
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    if endpoint != 'static' or app.debug or not app.config['STATIC_FINGERPRINT']:
+        return
+    
+    hashed = load_manifest(app.static_folder).get(values.get('filename'))
+    if hashed:
+        values['filename'] = f'{STATIC_DIST_DIRNAME}/{hashed}'
+
+@app.route('/static/dist/<path:filename>')
+def static_dist(filename):
+    encoding, path = preferred_encoding(app.static_folder, filename, request.accept_encodings)
+    
+    response = send_from_directory(
+        dist_folder(app.static_folder), path,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        max_age=STATIC_MAX_AGE
+    )
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 def ensure_db_initialized():
     global _db_initialized
     if not _db_initialized:
         try:
             init_db()
             _db_initialized = True
-        except Exception as e:
-            pass
+        except Exception:
+            app.logger.exception('Erro ao inicializar o banco de dados')
 
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     try:
@@ -55,12 +95,33 @@ def home():
 def explore():
     try:
         ensure_db_initialized()
-        events = Event.find_public_events(limit=20)
-        popular_events = Event.find_popular_events(limit=5)
+        after = request.args.get('depois')
+        cursor = decode_cursor(after, 3)
+        page_size = app.config['EVENTS_PAGE_SIZE']
+        events, next_cursor = cached_listing(
+            ('public_events', cursor, page_size),
+            lambda: paginate(Event.find_public_events(limit=page_size + 1, after=after), page_size, Event.page_key)
+        )
+        popular_events = [] if cursor else cached_listing(
+            ('popular_events', 5), lambda: Event.find_popular_events(limit=5)
+        )
+        schedule_popularity_refresh()
     except:
         events = []
+        next_cursor = None
         popular_events = []
-    return render_template('explore.html', events=events, popular_events=popular_events)
+    return render_template('explore.html', events=events, popular_events=popular_events, next_cursor=next_cursor)
+
+@app.route('/buscar')
+def search():
+    ensure_db_initialized()
+    query = request.args.get('q', '').strip()
+    page_size = app.config['EVENTS_PAGE_SIZE']
+    events, next_cursor = paginate(
+        Event.search(query, session.get('user_id'), limit=page_size + 1, after=request.args.get('depois')),
+        page_size, Event.search_key
+    )
+    return render_template('search.html', query=query, events=events, next_cursor=next_cursor)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -143,9 +204,13 @@ def logout():
 def dashboard():
     from database import call_procedure_get_user_activity
     user_id = session['user_id']
-    events = Event.find_by_user(user_id)
+    page_size = app.config['EVENTS_PAGE_SIZE']
+    events, next_cursor = paginate(
+        Event.find_by_user(user_id, limit=page_size + 1, after=request.args.get('depois')),
+        page_size, Event.page_key
+    )
     user_stats = call_procedure_get_user_activity(user_id)
-    return render_template('dashboard.html', events=events, user_stats=user_stats)
+    return render_template('dashboard.html', events=events, user_stats=user_stats, next_cursor=next_cursor)
 
 @app.route('/evento/criar', methods=['GET', 'POST'])
 @login_required
@@ -185,6 +250,7 @@ def create_event():
 @app.route('/evento/<int:event_id>')
 def event_details(event_id):
     from database import call_procedure_get_event_stats
+    from models import User, Follow, Like, Comment
     user_id = session.get('user_id')
     can_view, event = EventController.can_view(event_id, user_id)
     
@@ -195,9 +261,84 @@ def event_details(event_id):
         else:
             return redirect(url_for('explore'))
     
-    photos = Photo.find_by_event(event_id)
+    photos = Photo.find_metadata_by_event(event_id)
     event_stats = call_procedure_get_event_stats(event_id)
-    return render_template('event_details.html', event=event, photos=photos, event_stats=event_stats)
+    author = User.find_by_id(event.user_id)
+    is_following = bool(user_id and Follow.find(user_id, event.user_id))
+    has_liked = bool(user_id and Like.exists(event_id, user_id))
+    page_size = app.config['COMMENTS_PAGE_SIZE']
+    comments, next_comments_cursor = paginate(
+        Comment.find_by_event(event_id, limit=page_size + 1, after=request.args.get('comentarios')),
+        page_size, Comment.page_key
+    )
+    return render_template(
+        'event_details.html', event=event, photos=photos, event_stats=event_stats,
+        author=author, is_following=is_following, has_liked=has_liked,
+        comments=comments, next_comments_cursor=next_comments_cursor
+    )
+
+@app.route('/evento/<int:event_id>/curtir', methods=['POST'])
+@login_required
+def like_event(event_id):
+    success, message = LikeController.like(event_id, session['user_id'])
+    if not success:
+        flash(message, 'error')
+    return redirect(url_for('event_details', event_id=event_id))
+
+@app.route('/evento/<int:event_id>/descurtir', methods=['POST'])
+@login_required
+def unlike_event(event_id):
+    success, message = LikeController.unlike(event_id, session['user_id'])
+    if not success:
+        flash(message, 'error')
+    return redirect(url_for('event_details', event_id=event_id))
+
+@app.route('/evento/<int:event_id>/comentarios', methods=['GET', 'POST'])
+def event_comments(event_id):
+    from models import Comment
+    user_id = session.get('user_id')
+    
+    if request.method == 'POST':
+        if not user_id:
+            flash('Você precisa fazer login para acessar esta página.', 'error')
+            return redirect(url_for('login'))
+        
+        success, message, _ = CommentController.create(event_id, user_id, request.form.get('content', ''))
+        flash(message, 'success' if success else 'error')
+        return redirect(url_for('event_details', event_id=event_id) + '#comentarios')
+    
+    can_view, event = EventController.can_view(event_id, user_id)
+    if not can_view:
+        return jsonify({'error': 'Evento não encontrado.'}), 404
+    
+    page_size = app.config['COMMENTS_PAGE_SIZE']
+    comments, next_cursor = paginate(
+        Comment.find_by_event(event_id, limit=page_size + 1, after=request.args.get('depois')),
+        page_size, Comment.page_key
+    )
+    return jsonify({
+        'comments': [
+            {
+                'id': comment.id,
+                'user_id': comment.user_id,
+                'user_name': comment.user_name,
+                'content': comment.content,
+                'created_at': comment.created_at
+            }
+            for comment in comments
+        ],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/comentario/<int:comment_id>/excluir', methods=['POST'])
+@login_required
+def delete_comment(comment_id):
+    success, message, comment = CommentController.delete(comment_id, session['user_id'])
+    flash(message, 'success' if success else 'error')
+    
+    if comment:
+        return redirect(url_for('event_details', event_id=comment.event_id) + '#comentarios')
+    return redirect(url_for('dashboard'))
 
 @app.route('/evento/<int:event_id>/editar', methods=['GET', 'POST'])
 @login_required
@@ -259,6 +400,36 @@ def delete_event(event_id):
     
     return redirect(url_for('dashboard'))
 
+@app.route('/feed')
+@login_required
+def feed():
+    page_size = app.config['EVENTS_PAGE_SIZE']
+    events, next_cursor = paginate(
+        Event.find_feed(session['user_id'], limit=page_size + 1, after=request.args.get('depois')),
+        page_size, Event.feed_key
+    )
+    return render_template('feed.html', events=events, next_cursor=next_cursor)
+
+@app.route('/usuario/<int:user_id>/seguir', methods=['POST'])
+@login_required
+def follow_user(user_id):
+    success, message, _ = FollowController.follow(session['user_id'], user_id)
+    flash(message, 'success' if success else 'error')
+    return redirect_after_follow()
+
+@app.route('/usuario/<int:user_id>/deixar-de-seguir', methods=['POST'])
+@login_required
+def unfollow_user(user_id):
+    success, message, _ = FollowController.unfollow(session['user_id'], user_id)
+    flash(message, 'success' if success else 'error')
+    return redirect_after_follow()
+
+def redirect_after_follow():
+    event_id = request.form.get('event_id', type=int)
+    if event_id:
+        return redirect(url_for('event_details', event_id=event_id))
+    return redirect(url_for('feed'))
+
 @app.route('/evento/<int:event_id>/upload', methods=['POST'])
 @login_required
 def upload_photo(event_id):
@@ -274,23 +445,20 @@ def upload_photo(event_id):
         flash('Nenhum arquivo foi selecionado.', 'error')
         return redirect(url_for('event_details', event_id=event_id))
     
-    success_count = 0
-    error_count = 0
-    error_messages = []
-    
-    for file in files:
-        if file.filename:
-            success, message, photo = PhotoController.upload(
-                event_id, user_id, file
-            )
-            
-            if success:
-                success_count += 1
-            else:
-                error_count += 1
-                error_messages.append(message)
+    success, message, results = PhotoController.upload_many(
+        event_id, user_id, [file for file in files if file.filename]
+    )
+    
+    if not results:
+        flash(message, 'error')
+        return redirect(url_for('event_details', event_id=event_id))
+    
+    success_count = sum(1 for result in results if result[0])
+    error_count = len(results) - success_count
+    error_messages = [result[1] for result in results if not result[0]]
     
     if success_count > 0:
+        schedule_archive_build(event_id)
         if success_count == 1:
             flash(f'{success_count} foto enviada com sucesso!', 'success')
         else:
@@ -306,44 +474,190 @@ def upload_photo(event_id):
     
     return redirect(url_for('event_details', event_id=event_id))
 
-@app.route('/photo/<int:photo_id>')
-def get_photo(photo_id):
-    from flask import Response
+@app.route('/evento/<int:event_id>/uploads', methods=['POST'])
+@login_required
+def start_chunked_upload(event_id):
+    data = request.get_json(silent=True) or request.form
     
-    photo = Photo.find_by_id(photo_id)
+    success, message, upload = UploadController.start(
+        event_id, session['user_id'], data.get('filename', '').strip(), data.get('size')
+    )
     
-    if not photo or not photo.binary_data:
-        return "Foto não encontrada", 404
+    if not success:
+        return jsonify(error=message), 400
     
-    return Response(
-        photo.binary_data,
-        mimetype=photo.content_type,
-        headers={'Content-Disposition': f'inline; filename="{photo.filename}"'}
+    response = jsonify(
+        upload_id=upload.id,
+        offset=0,
+        size=upload.total_size,
+        url=url_for('chunked_upload', upload_id=upload.id)
     )
+    response.status_code = 201
+    response.headers['Location'] = url_for('chunked_upload', upload_id=upload.id)
+    return response
 
-@app.route('/photo/<int:photo_id>/download')
-def download_photo(photo_id):
-    from flask import Response
+@app.route('/uploads/<upload_id>', methods=['GET', 'PUT'])
+@login_required
+def chunked_upload(upload_id):
+    from werkzeug.http import parse_content_range_header
     
-    photo = Photo.find_by_id(photo_id)
+    user_id = session['user_id']
     
-    if not photo or not photo.binary_data:
+    if request.method == 'PUT':
+        content_range = parse_content_range_header(request.headers.get('Content-Range'))
+        if content_range and content_range.start is not None:
+            offset = content_range.start
+        else:
+            try:
+                offset = int(request.headers.get('Upload-Offset', 0))
+            except ValueError:
+                return jsonify(error='Cabeçalho Upload-Offset inválido.'), 400
+        
+        success, message, upload = UploadController.write_chunk(upload_id, user_id, offset, request.stream)
+    else:
+        success, message, upload = UploadController.find(upload_id, user_id)
+    
+    if not upload:
+        return jsonify(error=message), 404
+    
+    received_size = upload.received_size
+    response = jsonify(offset=received_size, size=upload.total_size, complete=received_size == upload.total_size)
+    response.headers['Upload-Offset'] = str(received_size)
+    response.cache_control.no_store = True
+    
+    if not success:
+        response = jsonify(error=message, offset=received_size, size=upload.total_size)
+        response.headers['Upload-Offset'] = str(received_size)
+        response.status_code = 409
+    
+    return response
+
+@app.route('/uploads/<upload_id>/finalizar', methods=['POST'])
+@login_required
+def finalize_chunked_upload(upload_id):
+    success, message, photo = UploadController.finalize(upload_id, session['user_id'])
+    
+    if not success:
+        return jsonify(error=message), 400
+    
+    schedule_archive_build(photo.event_id)
+    return jsonify(photo_id=photo.id, url=url_for('get_photo', photo_id=photo.id)), 201
+
+def set_immutable_cache_headers(response):
+    response.cache_control.public = False
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = app.config['PHOTO_CACHE_MAX_AGE']
+    response.cache_control.immutable = True
+    return response
+
+def send_photo(photo_id, as_attachment=False):
+    from flask import Response, stream_with_context
+    from werkzeug.http import is_resource_modified
+    
+    photo = Photo.find_metadata_by_id(photo_id)
+    
+    if not photo or not photo.size:
         return "Foto não encontrada", 404
     
-    return Response(
-        photo.binary_data,
+    disposition = 'attachment' if as_attachment else 'inline'
+    headers = {
+        'Content-Disposition': f'{disposition}; filename="{photo.filename}"',
+        'Accept-Ranges': 'bytes'
+    }
+    
+    if not is_resource_modified(request.environ, etag=photo.etag, last_modified=photo.last_modified):
+        response = Response(status=304, headers=headers)
+        response.set_etag(photo.etag)
+        response.last_modified = photo.last_modified
+        return set_immutable_cache_headers(response)
+    
+    if photo.storage == 'filesystem':
+        response = send_file(
+            photo.path,
+            mimetype=photo.content_type,
+            as_attachment=as_attachment,
+            download_name=photo.filename,
+            etag=photo.etag,
+            last_modified=photo.last_modified,
+            conditional=True,
+            max_age=app.config['PHOTO_CACHE_MAX_AGE']
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+        return set_immutable_cache_headers(response)
+    
+    start, end = 0, photo.size
+    status = 200
+    if_range = request.if_range
+    range_matches = not request.headers.get('If-Range') or (
+        if_range.etag == photo.etag or
+        (if_range.date is not None and photo.last_modified is not None and photo.last_modified <= if_range.date)
+    )
+    
+    if request.range and len(request.range.ranges) == 1 and range_matches:
+        byte_range = request.range.range_for_length(photo.size)
+        if byte_range is None:
+            return Response(status=416, headers={'Content-Range': f'bytes */{photo.size}'})
+        start, end = byte_range
+        status = 206
+        headers['Content-Range'] = f'bytes {start}-{end - 1}/{photo.size}'
+    
+    headers['Content-Length'] = str(end - start)
+    
+    response = Response(
+        stream_with_context(photo.iter_binary_data(start, end)),
+        status=status,
         mimetype=photo.content_type,
-        headers={'Content-Disposition': f'attachment; filename="{photo.filename}"'}
+        headers=headers
     )
+    response.set_etag(photo.etag)
+    response.last_modified = photo.last_modified
+    return set_immutable_cache_headers(response)
+
+@app.route('/photo/<int:photo_id>')
+def get_photo(photo_id):
+    return send_photo(photo_id)
+
+@app.route('/photo/<int:photo_id>/thumb')
+def get_thumbnail(photo_id):
+    from flask import Response
+    from werkzeug.http import is_resource_modified
+    from models.thumbnail import Thumbnail
+    from thumbnails import schedule_thumbnails
+    
+    thumbnail = Thumbnail.find_by_photo_id(photo_id)
+    
+    if not thumbnail:
+        if not Photo.find_metadata_by_id(photo_id):
+            return "Foto não encontrada", 404
+        
+        schedule_thumbnails([photo_id])
+        response = redirect(url_for('get_photo', photo_id=photo_id))
+        response.cache_control.no_store = True
+        return response
+    
+    if not is_resource_modified(request.environ, etag=thumbnail.etag):
+        response = Response(status=304)
+    else:
+        response = Response(thumbnail.binary_data, mimetype=thumbnail.content_type)
+    
+    response.set_etag(thumbnail.etag)
+    return set_immutable_cache_headers(response)
+
+@app.route('/photo/<int:photo_id>/download')
+def download_photo(photo_id):
+    return send_photo(photo_id, as_attachment=True)
 
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
-        return send_from_directory(
+        response = send_from_directory(
             app.config['UPLOAD_FOLDER'],
             filename,
-            as_attachment=False
+            as_attachment=False,
+            max_age=app.config['PHOTO_CACHE_MAX_AGE']
         )
+        return set_immutable_cache_headers(response)
     except Exception:
         return "Arquivo não encontrado", 404
 
@@ -360,10 +674,8 @@ def download_file_attachment(filename):
 
 @app.route('/evento/<int:event_id>/download-all')
 def download_event_photos(event_id):
-    from flask import Response
-    import zipfile
-    import io
-    from models.photo import Photo
+    from flask import Response, stream_with_context
+    from archive import find_cached_archive, iter_cached_photos_zip
     
     event = Event.find_by_id(event_id)
     if not event:
@@ -379,25 +691,29 @@ def download_event_photos(event_id):
         else:
             return redirect(url_for('explore'))
     
-    photos = Photo.find_by_event(event_id)
+    download_name = f'evento_{event_id}_fotos.zip'
+    cached_archive = find_cached_archive(event_id, event.photos_version)
+    
+    if cached_archive:
+        return send_file(
+            cached_archive,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True
+        )
+    
+    photos = Photo.find_metadata_by_event(event_id)
     
     if not photos:
         flash('Nenhuma foto encontrada para download.', 'error')
         return redirect(url_for('event_details', event_id=event_id))
     
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for photo in photos:
-            if photo.binary_data:
-                zip_file.writestr(photo.filename, photo.binary_data)
-    
-    zip_buffer.seek(0)
-    
     return Response(
-        zip_buffer.getvalue(),
+        stream_with_context(iter_cached_photos_zip(event_id, event.photos_version, photos)),
         mimetype='application/zip',
         headers={
-            'Content-Disposition': f'attachment; filename="evento_{event_id}_fotos.zip"'
+            'Content-Disposition': f'attachment; filename="{download_name}"'
         }
     )
 
@@ -405,7 +721,7 @@ def download_event_photos(event_id):
 @login_required
 def delete_photo(photo_id):
     user_id = session['user_id']
-    photo = Photo.find_by_id(photo_id)
+    photo = Photo.find_metadata_by_id(photo_id)
     
     if not photo:
         flash('Foto não encontrada.', 'error')
@@ -422,6 +738,110 @@ def delete_photo(photo_id):
     
     return redirect(url_for('event_details', event_id=photo.event_id))
 
+@app.cli.command('migrate-db')
+@click.option('--batch-size', default=1000, show_default=True, help='Linhas por transação nas migrações de dados.')
+def migrate_db_command(batch_size):
+    from migrations import migrate, schema_version
+    
+    applied = migrate(batch_size)
+    click.echo(f'{applied} migração(ões) aplicada(s); esquema na versão {schema_version()}.')
+
+@app.cli.command('migrate-photo-storage')
+@click.option('--batch-size', default=50, show_default=True, help='Fotos movidas por transação.')
+def migrate_photo_storage_command(batch_size):
+    from storage import migrate_database_photos, PHOTO_STORAGE_PATH
+    
+    init_db()
+    migrated = migrate_database_photos(batch_size)
+    click.echo(f'{migrated} foto(s) movida(s) para {PHOTO_STORAGE_PATH}.')
+    if migrated:
+        click.echo('Execute VACUUM no banco para devolver o espaço liberado ao sistema de arquivos.')
+
+@app.cli.command('generate-thumbnails')
+@click.option('--batch-size', default=100, show_default=True, help='Fotos processadas por lote.')
+def generate_thumbnails_command(batch_size):
+    from thumbnails import backfill_thumbnails, is_available
+    
+    if not is_available():
+        raise click.ClickException('Pillow não está instalado; instale as dependências com pip install -r requirements.txt.')
+    
+    init_db()
+    generated = backfill_thumbnails(batch_size)
+    click.echo(f'{generated} miniatura(s) gerada(s).')
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    from database import rebuild_stats
+    from popularity import refresh_popularity
+    
+    init_db()
+    events_count, users_count = rebuild_stats()
+    refresh_popularity()
+    invalidate_listings()
+    click.echo(f'Contadores recalculados para {events_count} evento(s) e {users_count} usuário(s).')
+
+@app.cli.command('refresh-popularity')
+def refresh_popularity_command():
+    from popularity import refresh_popularity
+    
+    init_db()
+    updated = refresh_popularity()
+    click.echo(f'Ranking de popularidade atualizado para {updated} evento(s).')
+
+@app.cli.command('check-query-plans')
+@click.option('--output', default='query_plans.json', show_default=True, help='Arquivo JSON com planos e tempos.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Relatório anterior para comparar os tempos.')
+@click.option('--tolerance', default=2.0, show_default=True, help='Fator de lentidão aceito em relação ao relatório anterior.')
+@click.option('--repeat', default=5, show_default=True, help='Execuções por consulta para medir o tempo.')
+def check_query_plans_command(output, baseline, tolerance, repeat):
+    from query_plans import check_query_plans, compare_timings, load_report, save_report
+    
+    report = check_query_plans(repeat=repeat)
+    save_report(report, output)
+    
+    failed = False
+    for query in report['queries']:
+        problems = [
+            f"{problem} ({statement['origin']})" if statement['origin'] else problem
+            for statement in query['statements'] for problem in statement['problems']
+        ]
+        status = 'FALHOU' if problems else 'ok'
+        click.echo(f"{status:6} {query['median_ms']:9.3f} ms  {query['query']}")
+        for problem in problems:
+            click.echo(f'         {problem}')
+        failed = failed or bool(problems)
+    
+    if baseline:
+        for name, before, after in compare_timings(report, load_report(baseline), tolerance):
+            click.echo(f'LENTO  {name}: {before:.3f} ms -> {after:.3f} ms')
+            failed = True
+    
+    click.echo(f'Relatório salvo em {output}.')
+    if failed:
+        raise click.ClickException('Há consultas com planos ou tempos fora do esperado.')
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    from database import get_cursor, write_transaction
+    from migrations import rebuild_search_index
+    
+    init_db()
+    with write_transaction() as conn:
+        rebuild_search_index(get_cursor(conn))
+    click.echo('Índice de busca reconstruído.')
+
+@app.cli.command('build-assets')
+@click.option('--clean', is_flag=True, help='Remove arquivos de builds anteriores que não estão no novo manifesto.')
+def build_assets_command(clean):
+    from assets import build_assets, remove_stale_assets, brotli
+    
+    manifest, compressed = build_assets(app.static_folder)
+    click.echo(f'{len(manifest)} arquivo(s) com hash e {compressed} variante(s) pré-comprimida(s) em {dist_folder(app.static_folder)}.')
+    if brotli is None:
+        click.echo('Pacote brotli não instalado: apenas variantes gzip foram geradas.')
+    if clean:
+        click.echo(f'{remove_stale_assets(app.static_folder, manifest)} arquivo(s) antigo(s) removido(s).')
+
 if __name__ == '__main__':
     init_db()
     app.run(debug=True, host='0.0.0.0', port=5001)
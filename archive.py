@@ -0,0 +1,121 @@
+from datetime import datetime
+import glob
+import os
+import tempfile
+import zipfile
+import tasks
+
+COMPRESSED_CONTENT_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp'}
+ARCHIVE_CACHE_FOLDER = os.getenv(
+    'ARCHIVE_CACHE_FOLDER',
+    os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), 'archives')
+)
+PREBUILD_ARCHIVES = os.getenv('PREBUILD_ARCHIVES', '0') == '1'
+
+class _StreamBuffer:
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        chunks = self.chunks
+        self.chunks = []
+        return chunks
+
+def _zip_info(photo):
+    modified = photo.last_modified or datetime.now()
+    info = zipfile.ZipInfo(photo.filename, date_time=modified.timetuple()[:6])
+    info.external_attr = 0o644 << 16
+    info.file_size = photo.size
+    if photo.content_type in COMPRESSED_CONTENT_TYPES:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+def iter_photos_zip(photos):
+    buffer = _StreamBuffer()
+    
+    with zipfile.ZipFile(buffer, 'w', allowZip64=True) as zip_file:
+        for photo in photos:
+            if not photo.size:
+                continue
+            
+            info = _zip_info(photo)
+            with zip_file.open(info, 'w', force_zip64=photo.size > zipfile.ZIP64_LIMIT) as entry:
+                for chunk in photo.iter_binary_data():
+                    entry.write(chunk)
+                    yield from buffer.drain()
+            yield from buffer.drain()
+    
+    yield from buffer.drain()
+
+def cached_archive_path(event_id, photos_version):
+    return os.path.join(ARCHIVE_CACHE_FOLDER, f'evento_{event_id}_v{photos_version}.zip')
+
+def find_cached_archive(event_id, photos_version):
+    path = cached_archive_path(event_id, photos_version)
+    if os.path.exists(path):
+        return path
+    return None
+
+def remove_cached_archives(event_id, keep=None):
+    pattern = os.path.join(ARCHIVE_CACHE_FOLDER, f'evento_{event_id}_v*.zip')
+    for path in glob.glob(pattern):
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _current_photos_version(event_id):
+    from models.event import Event
+    
+    return Event.find_photos_version(event_id)
+
+def iter_cached_photos_zip(event_id, photos_version, photos):
+    os.makedirs(ARCHIVE_CACHE_FOLDER, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=ARCHIVE_CACHE_FOLDER, prefix='.tmp_', suffix='.zip')
+    completed = False
+    
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            for chunk in iter_photos_zip(photos):
+                tmp_file.write(chunk)
+                yield chunk
+        completed = True
+    finally:
+        if completed and _current_photos_version(event_id) == photos_version:
+            path = cached_archive_path(event_id, photos_version)
+            os.replace(tmp_path, path)
+            remove_cached_archives(event_id, keep=path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def build_event_archive(event_id):
+    from models.photo import Photo
+    
+    photos_version = _current_photos_version(event_id)
+    if photos_version is None or find_cached_archive(event_id, photos_version):
+        return None
+    
+    photos = Photo.find_metadata_by_event(event_id)
+    if not photos:
+        return None
+    
+    for _ in iter_cached_photos_zip(event_id, photos_version, photos):
+        pass
+    
+    return find_cached_archive(event_id, photos_version)
+
+def schedule_archive_build(event_id):
+    if not PREBUILD_ARCHIVES:
+        return None
+    return tasks.submit(build_event_archive, event_id)
@@ -0,0 +1,112 @@
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIST_DIRNAME = 'dist'
+STATIC_MANIFEST_FILENAME = 'manifest.json'
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.txt', '.json', '.map'}
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+_manifests = {}
+
+def dist_folder(static_folder):
+    return os.path.join(static_folder, STATIC_DIST_DIRNAME)
+
+def manifest_path(static_folder):
+    return os.path.join(dist_folder(static_folder), STATIC_MANIFEST_FILENAME)
+
+def fingerprinted_name(filename, data):
+    root, extension = os.path.splitext(filename)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+
+def _write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as output:
+        output.write(data)
+    os.replace(temp_path, path)
+
+def _write_compressed(path, data):
+    compressed = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed['.br'] = brotli.compress(data, quality=11)
+    
+    written = []
+    for suffix, payload in compressed.items():
+        if len(payload) < len(data):
+            _write_file(path + suffix, payload)
+            written.append(suffix)
+    return written
+
+def build_assets(static_folder):
+    output_folder = dist_folder(static_folder)
+    manifest = {}
+    compressed = 0
+    
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != output_folder)
+        
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            filename = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            
+            with open(source, 'rb') as source_file:
+                data = source_file.read()
+            
+            hashed = fingerprinted_name(filename, data)
+            target = os.path.join(output_folder, hashed)
+            if not os.path.exists(target):
+                _write_file(target, data)
+            
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                compressed += len(_write_compressed(target, data))
+            
+            manifest[filename] = hashed
+    
+    _write_file(
+        manifest_path(static_folder),
+        json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    )
+    _manifests.pop(static_folder, None)
+    return manifest, compressed
+
+def remove_stale_assets(static_folder, manifest):
+    output_folder = dist_folder(static_folder)
+    keep = {STATIC_MANIFEST_FILENAME}
+    for hashed in manifest.values():
+        keep.add(hashed)
+        keep.update(hashed + suffix for _, suffix in ENCODINGS)
+    
+    removed = 0
+    for root, dirs, files in os.walk(output_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, output_folder).replace(os.sep, '/') not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+def load_manifest(static_folder):
+    manifest = _manifests.get(static_folder)
+    if manifest is None:
+        try:
+            with open(manifest_path(static_folder), encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            manifest = {}
+        _manifests[static_folder] = manifest
+    return manifest
+
+def preferred_encoding(static_folder, hashed, accept_encodings):
+    base = os.path.join(dist_folder(static_folder), hashed)
+    for encoding, suffix in ENCODINGS:
+        if accept_encodings[encoding] and os.path.isfile(base + suffix):
+            return encoding, hashed + suffix
+    return None, hashed
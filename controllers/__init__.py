@@ -1,5 +1,9 @@
 from controllers.auth_controller import AuthController
 from controllers.event_controller import EventController
 from controllers.photo_controller import PhotoController
+from controllers.upload_controller import UploadController
+from controllers.follow_controller import FollowController
+from controllers.like_controller import LikeController
+from controllers.comment_controller import CommentController
 
-__all__ = ['AuthController', 'EventController', 'PhotoController']
+__all__ = ['AuthController', 'EventController', 'PhotoController', 'UploadController', 'FollowController', 'LikeController', 'CommentController']
@@ -1,6 +1,10 @@
 from models.user import User
+from passwords import PasswordHashingBusy, needs_rehash
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 class AuthController:
     
     @staticmethod
@@ -44,7 +48,10 @@ class AuthController:
         if existing_user:
             return False, "Este email já está cadastrado.", None
         
-        user = User.create(name, email, password)
+        try:
+            user = User.create(name, email, password)
+        except PasswordHashingBusy:
+            return False, "Servidor ocupado no momento. Tente novamente em instantes.", None
         
         if user:
             return True, "Usuário cadastrado com sucesso!", user
@@ -64,8 +71,19 @@ class AuthController:
         if not user:
             return False, "Email ou senha incorretos.", None
         
-        if not user.verify_password(password):
-            return False, "Email ou senha incorretos.", None
+        try:
+            if not user.verify_password(password):
+                return False, "Email ou senha incorretos.", None
+        except PasswordHashingBusy:
+            return False, "Servidor ocupado no momento. Tente novamente em instantes.", None
+        
+        try:
+            if needs_rehash(user.password_hash):
+                user.update_password(password)
+        except PasswordHashingBusy:
+            pass
+        except Exception:
+            logger.exception('Erro ao recalcular o hash da senha do usuário %s', user.id)
         
         return True, "Login realizado com sucesso!", user
     
@@ -88,7 +106,12 @@ class AuthController:
         if not user:
             return False, "Email não encontrado."
         
-        if user.update_password(new_password):
+        try:
+            updated = user.update_password(new_password)
+        except PasswordHashingBusy:
+            return False, "Servidor ocupado no momento. Tente novamente em instantes."
+        
+        if updated:
             return True, "Senha redefinida com sucesso!"
         else:
             return False, "Erro ao redefinir senha. Tente novamente."
@@ -0,0 +1,44 @@
+from models.comment import Comment
+from models.event import Event
+from controllers.event_controller import EventController
+
+class CommentController:
+    
+    @staticmethod
+    def validate_content(content):
+        if not content or not isinstance(content, str):
+            return False
+        content = content.strip()
+        return len(content) >= 1 and len(content) <= 1000
+    
+    @staticmethod
+    def create(event_id, user_id, content):
+        can_view, event = EventController.can_view(event_id, user_id)
+        
+        if not can_view:
+            return False, "Evento não encontrado ou você não tem permissão para visualizá-lo.", None
+        
+        if not CommentController.validate_content(content):
+            return False, "O comentário deve ter entre 1 e 1000 caracteres.", None
+        
+        comment = Comment.create(event_id, user_id, content.strip())
+        
+        if not comment:
+            return False, "Erro ao publicar comentário. Tente novamente.", None
+        
+        return True, "Comentário publicado!", comment
+    
+    @staticmethod
+    def delete(comment_id, user_id):
+        comment = Comment.find_by_id(comment_id)
+        
+        if not comment:
+            return False, "Comentário não encontrado.", None
+        
+        event = Event.find_by_id(comment.event_id)
+        
+        if comment.user_id != user_id and not (event and event.is_owner(user_id)):
+            return False, "Você não tem permissão para excluir este comentário.", comment
+        
+        comment.delete()
+        return True, "Comentário excluído com sucesso!", comment
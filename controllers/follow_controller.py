@@ -0,0 +1,32 @@
+from models.follow import Follow
+from models.user import User
+
+class FollowController:
+    
+    @staticmethod
+    def follow(follower_id, following_id):
+        if follower_id == following_id:
+            return False, "Você não pode seguir a si mesmo.", None
+        
+        user = User.find_by_id(following_id)
+        if not user:
+            return False, "Usuário não encontrado.", None
+        
+        if Follow.find(follower_id, following_id):
+            return True, f"Você já segue {user.name}.", user
+        
+        if not Follow.create(follower_id, following_id):
+            return False, "Erro ao seguir usuário. Tente novamente.", None
+        
+        return True, f"Agora você segue {user.name}!", user
+    
+    @staticmethod
+    def unfollow(follower_id, following_id):
+        follow = Follow.find(follower_id, following_id)
+        
+        if not follow:
+            return False, "Você não segue este usuário.", None
+        
+        follow.delete()
+        user = User.find_by_id(following_id)
+        return True, f"Você deixou de seguir {user.name if user else 'o usuário'}.", user
@@ -0,0 +1,25 @@
+from models.like import Like
+from controllers.event_controller import EventController
+
+class LikeController:
+    
+    @staticmethod
+    def like(event_id, user_id):
+        can_view, event = EventController.can_view(event_id, user_id)
+        
+        if not can_view:
+            return False, "Evento não encontrado ou você não tem permissão para visualizá-lo."
+        
+        if Like.create(event_id, user_id):
+            return True, "Você curtiu este evento."
+        return True, "Você já curtiu este evento."
+    
+    @staticmethod
+    def unlike(event_id, user_id):
+        can_view, event = EventController.can_view(event_id, user_id)
+        
+        if not can_view:
+            return False, "Evento não encontrado ou você não tem permissão para visualizá-lo."
+        
+        Like.delete_by_user(event_id, user_id)
+        return True, "Curtida removida."
@@ -1,5 +1,6 @@
 from models.photo import Photo
 from models.event import Event
+from thumbnails import schedule_thumbnails
 import os
 from werkzeug.utils import secure_filename
 import uuid
@@ -18,50 +19,75 @@ class PhotoController:
     
     @staticmethod
     def upload(event_id, user_id, file):
-        if not file or not file.filename:
-            return False, "Nenhum arquivo foi enviado.", None
-        
-        if not PhotoController.allowed_file(file.filename):
-            return False, "Tipo de arquivo não permitido. Use apenas imagens (PNG, JPG, JPEG, GIF, WEBP).", None
+        success, message, results = PhotoController.upload_many(event_id, user_id, [file])
         
+        if not results:
+            return success, message, None
+        return results[0]
+    
+    @staticmethod
+    def upload_many(event_id, user_id, files):
         event = Event.find_by_id(event_id)
         
         if not event:
-            return False, "Evento não encontrado.", None
+            return False, "Evento não encontrado.", []
         
         if not event.is_owner(user_id):
-            return False, "Você não tem permissão para adicionar fotos a este evento.", None
-        
-        try:
-            file.seek(0)
-            binary_data = file.read()
-            file.seek(0)
+            return False, "Você não tem permissão para adicionar fotos a este evento.", []
+        
+        content_type_map = {
+            'jpg': 'image/jpeg',
+            'jpeg': 'image/jpeg',
+            'png': 'image/png',
+            'gif': 'image/gif',
+            'webp': 'image/webp'
+        }
+        
+        results = [None] * len(files)
+        pending = []
+        
+        for index, file in enumerate(files):
+            if not file or not file.filename:
+                results[index] = (False, "Nenhum arquivo foi enviado.", None)
+                continue
+            
+            if not PhotoController.allowed_file(file.filename):
+                results[index] = (False, "Tipo de arquivo não permitido. Use apenas imagens (PNG, JPG, JPEG, GIF, WEBP).", None)
+                continue
+            
+            try:
+                file.seek(0)
+                binary_data = file.read()
+                file.seek(0)
+            except Exception as e:
+                results[index] = (False, f"Erro ao fazer upload da foto: {str(e)}", None)
+                continue
             
             file_extension = file.filename.rsplit('.', 1)[1].lower()
-            content_type_map = {
-                'jpg': 'image/jpeg',
-                'jpeg': 'image/jpeg',
-                'png': 'image/png',
-                'gif': 'image/gif',
-                'webp': 'image/webp'
-            }
             content_type = content_type_map.get(file_extension, 'image/jpeg')
-            
-            original_filename = secure_filename(file.filename)
             unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
             
-            photo = Photo.create(event_id, user_id, unique_filename, binary_data, content_type)
+            pending.append((index, (unique_filename, binary_data, content_type)))
+        
+        if pending:
+            photos = Photo.create_many(event_id, user_id, [item for _, item in pending])
             
-            if photo:
-                return True, "Foto enviada com sucesso!", photo
-            else:
-                return False, "Erro ao salvar foto no banco de dados.", None
-        except Exception as e:
-            return False, f"Erro ao fazer upload da foto: {str(e)}", None
+            for (index, _), photo in zip(pending, photos):
+                if photo:
+                    results[index] = (True, "Foto enviada com sucesso!", photo)
+                else:
+                    results[index] = (False, "Erro ao salvar foto no banco de dados.", None)
+            
+            schedule_thumbnails(photo.id for photo in photos if photo)
+        
+        success = any(result[0] for result in results)
+        if success:
+            return True, "Fotos enviadas com sucesso!", results
+        return False, "Nenhuma foto pôde ser enviada.", results
     
     @staticmethod
     def delete(photo_id, user_id):
-        photo = Photo.find_by_id(photo_id)
+        photo = Photo.find_metadata_by_id(photo_id)
         
         if not photo:
             return False, "Foto não encontrada."
@@ -0,0 +1,96 @@
+from models.event import Event
+from models.upload_session import UploadSession
+from controllers.photo_controller import PhotoController
+from werkzeug.datastructures import FileStorage
+import os
+
+MAX_PHOTO_SIZE = int(os.getenv('MAX_PHOTO_SIZE', 50 * 1024 * 1024))
+
+class UploadController:
+    
+    @staticmethod
+    def start(event_id, user_id, filename, total_size):
+        if not filename:
+            return False, "Nome do arquivo é obrigatório.", None
+        
+        if not PhotoController.allowed_file(filename):
+            return False, "Tipo de arquivo não permitido. Use apenas imagens (PNG, JPG, JPEG, GIF, WEBP).", None
+        
+        try:
+            total_size = int(total_size)
+        except (TypeError, ValueError):
+            return False, "Tamanho do arquivo inválido.", None
+        
+        if total_size <= 0 or total_size > MAX_PHOTO_SIZE:
+            return False, f"O arquivo deve ter entre 1 byte e {MAX_PHOTO_SIZE // (1024 * 1024)} MB.", None
+        
+        event = Event.find_by_id(event_id)
+        
+        if not event:
+            return False, "Evento não encontrado.", None
+        
+        if not event.is_owner(user_id):
+            return False, "Você não tem permissão para adicionar fotos a este evento.", None
+        
+        UploadSession.delete_expired()
+        upload = UploadSession.create(event_id, user_id, filename, total_size)
+        
+        if upload:
+            return True, "Envio iniciado.", upload
+        else:
+            return False, "Erro ao iniciar envio. Tente novamente.", None
+    
+    @staticmethod
+    def find(upload_id, user_id):
+        upload = UploadSession.find_by_id(upload_id)
+        
+        if not upload or upload.user_id != user_id:
+            return False, "Envio não encontrado.", None
+        
+        return True, "", upload
+    
+    @staticmethod
+    def write_chunk(upload_id, user_id, offset, stream):
+        success, message, upload = UploadController.find(upload_id, user_id)
+        
+        if not success:
+            return False, message, None
+        
+        received_size = upload.received_size
+        if offset != received_size:
+            return False, f"Deslocamento inválido. O servidor já recebeu {received_size} bytes.", upload
+        
+        try:
+            upload.write_chunk(offset, stream)
+        except ValueError as e:
+            return False, str(e), upload
+        except FileNotFoundError:
+            return False, "Envio não encontrado.", None
+        
+        return True, "Bloco recebido.", upload
+    
+    @staticmethod
+    def finalize(upload_id, user_id):
+        success, message, upload = UploadController.find(upload_id, user_id)
+        
+        if not success:
+            return False, message, None
+        
+        if not upload.is_complete:
+            return False, f"Envio incompleto: {upload.received_size} de {upload.total_size} bytes recebidos.", None
+        
+        try:
+            with upload.open_part('rb') as part_file:
+                received_size = os.fstat(part_file.fileno()).st_size
+                if received_size != upload.total_size:
+                    return False, f"Envio incompleto: {received_size} de {upload.total_size} bytes recebidos.", None
+                
+                file = FileStorage(stream=part_file, filename=upload.filename)
+                success, message, photo = PhotoController.upload(upload.event_id, user_id, file)
+                
+                if success:
+                    upload.delete()
+        except FileNotFoundError:
+            return False, "Envio não encontrado.", None
+        
+        return success, message, photo
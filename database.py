@@ -1,171 +1,363 @@
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+import logging
 import os
+import queue
 import sqlite3
 import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 _thread_local = threading.local()
 DB_PATH = os.getenv('DATABASE_PATH', 'memo.db')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 16))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 16 * 1024))
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 256 * 1024 * 1024))
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+DB_GROUP_COMMIT = os.getenv('DB_GROUP_COMMIT', '0') == '1'
+DB_GROUP_COMMIT_WINDOW_MS = float(os.getenv('DB_GROUP_COMMIT_WINDOW_MS', 2))
+DB_GROUP_COMMIT_MAX_BATCH = int(os.getenv('DB_GROUP_COMMIT_MAX_BATCH', 64))
+DB_GROUP_COMMIT_TIMEOUT = float(os.getenv('DB_GROUP_COMMIT_TIMEOUT', DB_BUSY_TIMEOUT_MS / 1000 * 2 + 10))
 
-def get_db():
-    if hasattr(_thread_local, 'conn') and _thread_local.conn:
-        try:
-            _thread_local.conn.execute('SELECT 1')
-            return _thread_local.conn
-        except:
-            _thread_local.conn = None
+class ConnectionManager:
     
-    try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    def __init__(self, path, pool_size=DB_POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._writer = None
+        self._write_depth = 0
+        self._write_owner = None
+    
+    def _connect(self, read_only):
+        try:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                check_same_thread=False,
+                isolation_level=None if not read_only else ''
+            )
+        except Exception as e:
+            raise ConnectionError(f"Erro ao conectar ao banco de dados: {e}")
+        
         conn.row_factory = sqlite3.Row
         conn.execute('PRAGMA foreign_keys = ON')
-        _thread_local.conn = conn
+        conn.execute(f'PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}')
+        conn.execute(f'PRAGMA cache_size = {-DB_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+        
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        else:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute(f'PRAGMA synchronous = {DB_SYNCHRONOUS}')
+        
         return conn
-    except Exception as e:
-        raise ConnectionError(f"Erro ao conectar ao banco de dados: {e}")
-
-def close_db():
-    if hasattr(_thread_local, 'conn') and _thread_local.conn:
+    
+    def acquire(self):
         try:
-            _thread_local.conn.close()
-        except:
+            return self._idle.get_nowait()
+        except queue.Empty:
             pass
-        finally:
-            _thread_local.conn = None
-
-def get_cursor(conn=None):
-    if conn is None:
-        conn = get_db()
-    return conn.cursor()
-
-def migrate_db():
-    conn = get_db()
-    cursor = get_cursor(conn)
-    
-    try:
-        cursor.execute("PRAGMA table_info(photos)")
-        photo_columns = [row[1] for row in cursor.fetchall()]
         
-        if 'user_id' not in photo_columns:
-            cursor.execute('ALTER TABLE photos ADD COLUMN user_id INTEGER')
-            cursor.execute('UPDATE photos SET user_id = (SELECT user_id FROM events WHERE events.id = photos.event_id LIMIT 1) WHERE user_id IS NULL')
+        with self._pool_lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        
+        if create:
+            try:
+                return self._connect(read_only=True)
+            except Exception:
+                with self._pool_lock:
+                    self._created -= 1
+                raise
         
-        conn.commit()
-    except Exception:
-        conn.rollback()
+        try:
+            return self._idle.get(timeout=DB_POOL_TIMEOUT)
+        except queue.Empty:
+            raise ConnectionError("Erro ao conectar ao banco de dados: nenhuma conexão disponível no pool.")
+    
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except Exception:
+            with self._pool_lock:
+                self._created -= 1
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
+    @contextmanager
+    def write_transaction(self):
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect(read_only=False)
+            conn = self._writer
+            
+            if self._write_depth:
+                self._write_depth += 1
+                try:
+                    yield conn
+                finally:
+                    self._write_depth -= 1
+                return
+            
+            conn.execute('BEGIN IMMEDIATE')
+            self._write_depth = 1
+            self._write_owner = threading.get_ident()
+            try:
+                yield conn
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            finally:
+                self._write_depth = 0
+                self._write_owner = None
+    
+    def in_write_transaction(self):
+        return self._write_depth > 0 and self._write_owner == threading.get_ident()
+    
+    def close(self):
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._pool_lock:
+                self._created -= 1
 
-def init_db():
-    conn = get_db()
-    cursor = get_cursor(conn)
+def _settle(future, result=None, exception=None):
+    if future.done():
+        return
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+class WriteQueue:
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL UNIQUE,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    def __init__(self, window_ms=DB_GROUP_COMMIT_WINDOW_MS, max_batch=DB_GROUP_COMMIT_MAX_BATCH):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='memo-db-writer', daemon=True)
+        self._thread.start()
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            description TEXT NOT NULL,
-            location TEXT NOT NULL,
-            date DATE NOT NULL,
-            visibility TEXT NOT NULL DEFAULT 'private',
-            cover_image TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-    ''')
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self._jobs.put((future, func, args, kwargs))
+        return future
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS photos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            filename TEXT NOT NULL,
-            binary_data BLOB,
-            content_type TEXT DEFAULT 'image/jpeg',
-            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-    ''')
+    def stop(self):
+        self._jobs.put(None)
+        self._thread.join()
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS comments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-    ''')
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._jobs.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                self._jobs.put(None)
+                break
+            batch.append(job)
+        
+        return batch
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS likes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            UNIQUE(event_id, user_id)
-        )
-    ''')
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            
+            batch = self._collect(job)
+            try:
+                self._commit(batch)
+            except Exception as e:
+                logger.exception('Erro na thread escritora do banco de dados')
+                for future, _, _, _ in batch:
+                    _settle(future, exception=e)
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_follows (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            follower_id INTEGER NOT NULL,
-            following_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (follower_id) REFERENCES users(id) ON DELETE CASCADE,
-            FOREIGN KEY (following_id) REFERENCES users(id) ON DELETE CASCADE,
-            UNIQUE(follower_id, following_id),
-            CHECK(follower_id != following_id)
-        )
-    ''')
+    def _commit(self, batch):
+        outcomes = []
+        
+        try:
+            with write_transaction() as conn:
+                for future, func, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        outcomes.append(None)
+                        continue
+                    
+                    conn.execute('SAVEPOINT group_commit_job')
+                    try:
+                        outcomes.append((True, func(conn, *args, **kwargs)))
+                        conn.execute('RELEASE group_commit_job')
+                    except Exception as e:
+                        conn.execute('ROLLBACK TO group_commit_job')
+                        conn.execute('RELEASE group_commit_job')
+                        outcomes.append((False, e))
+        except Exception as e:
+            for future, _, _, _ in batch:
+                _settle(future, exception=e)
+            return
+        
+        for (future, _, _, _), outcome in zip(batch, outcomes):
+            if outcome is None:
+                continue
+            succeeded, value = outcome
+            if succeeded:
+                _settle(future, result=value)
+            else:
+                _settle(future, exception=value)
+
+_manager = ConnectionManager(DB_PATH)
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def get_db():
+    conn = getattr(_thread_local, 'conn', None)
+    if conn is None:
+        conn = _manager.acquire()
+        _thread_local.conn = conn
+    return conn
+
+def close_db():
+    conn = getattr(_thread_local, 'conn', None)
+    if conn is not None:
+        _thread_local.conn = None
+        _manager.release(conn)
+
+def use_database(path):
+    global _manager
+    close_db()
+    _manager.close()
+    _manager = ConnectionManager(path)
+
+def close_all_connections():
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is not None:
+            _write_queue.stop()
+            _write_queue = None
+    close_db()
+    _manager.close()
+
+def reset_after_fork():
+    global _manager, _write_queue, _write_queue_lock
+    _thread_local.conn = None
+    _manager = ConnectionManager(_manager.path, _manager.pool_size)
+    _write_queue = None
+    _write_queue_lock = threading.Lock()
+
+def write_transaction():
+    return _manager.write_transaction()
+
+def get_write_queue():
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue()
+    return _write_queue
+
+def run_write(func, *args, **kwargs):
+    if not DB_GROUP_COMMIT or _manager.in_write_transaction():
+        with write_transaction() as conn:
+            return func(conn, *args, **kwargs)
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS event_participants (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            status TEXT NOT NULL DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            UNIQUE(event_id, user_id)
-        )
-    ''')
-    
-    conn.commit()
-    
-    migrate_db()
-    
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_user_id ON events(user_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_visibility ON events(visibility)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_photos_event_id ON photos(event_id)')
+    future = get_write_queue().submit(func, *args, **kwargs)
     try:
-        cursor.execute("PRAGMA table_info(photos)")
-        photo_columns = [row[1] for row in cursor.fetchall()]
-        if 'user_id' in photo_columns:
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_photos_user_id ON photos(user_id)')
-    except:
-        pass
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_event_id ON comments(event_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_user_id ON comments(user_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_likes_event_id ON likes(event_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_likes_user_id ON likes(user_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
+        return future.result(timeout=DB_GROUP_COMMIT_TIMEOUT)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise sqlite3.OperationalError('Tempo esgotado aguardando a gravação no banco de dados.')
+    
+    return future.result()
+
+def get_cursor(conn=None):
+    if conn is None:
+        conn = get_db()
+    return conn.cursor()
+
+def init_db():
+    from migrations import migrate
+    return migrate()
+
+def rebuild_stats():
+    with write_transaction() as conn:
+        cursor = get_cursor(conn)
+        
+        cursor.execute('DELETE FROM event_stats')
+        cursor.execute('''
+            INSERT INTO event_stats (event_id, photos_count, comments_count, likes_count, participants_count)
+            SELECT
+                e.id,
+                (SELECT COUNT(*) FROM photos WHERE event_id = e.id),
+                (SELECT COUNT(*) FROM comments WHERE event_id = e.id),
+                (SELECT COUNT(*) FROM likes WHERE event_id = e.id),
+                (SELECT COUNT(*) FROM event_participants WHERE event_id = e.id)
+            FROM events e
+        ''')
+        events_count = cursor.rowcount
+        
+        cursor.execute('DELETE FROM user_stats')
+        cursor.execute('''
+            INSERT INTO user_stats (user_id, events_count, photos_count, comments_count,
+                                    likes_given_count, following_count, followers_count)
+            SELECT
+                u.id,
+                (SELECT COUNT(*) FROM events WHERE user_id = u.id),
+                (SELECT COUNT(*) FROM photos WHERE user_id = u.id),
+                (SELECT COUNT(*) FROM comments WHERE user_id = u.id),
+                (SELECT COUNT(*) FROM likes WHERE user_id = u.id),
+                (SELECT COUNT(*) FROM user_follows WHERE follower_id = u.id),
+                (SELECT COUNT(*) FROM user_follows WHERE following_id = u.id)
+            FROM users u
+        ''')
+        users_count = cursor.rowcount
+        
+        cursor.execute('DELETE FROM event_popularity')
+        cursor.execute('''
+            INSERT INTO event_popularity (event_id, event_date, raw_score, score)
+            SELECT e.id, e.date,
+                   s.likes_count + s.comments_count * 2 + s.photos_count,
+                   s.likes_count + s.comments_count * 2 + s.photos_count
+            FROM events e
+            JOIN event_stats s ON s.event_id = e.id
+            WHERE e.visibility = 'public'
+        ''')
     
-    conn.commit()
+    return events_count, users_count
 
 def call_procedure_get_event_stats(event_id):
     conn = get_db()
@@ -175,17 +367,13 @@ def call_procedure_get_event_stats(event_id):
         SELECT 
             e.id,
             e.title,
-            COUNT(DISTINCT p.id) as total_photos,
-            COUNT(DISTINCT c.id) as total_comments,
-            COUNT(DISTINCT l.id) as total_likes,
-            COUNT(DISTINCT ep.user_id) as total_participants
+            COALESCE(s.photos_count, 0) as total_photos,
+            COALESCE(s.comments_count, 0) as total_comments,
+            COALESCE(s.likes_count, 0) as total_likes,
+            COALESCE(s.participants_count, 0) as total_participants
         FROM events e
-        LEFT JOIN photos p ON e.id = p.event_id
-        LEFT JOIN comments c ON e.id = c.event_id
-        LEFT JOIN likes l ON e.id = l.event_id
-        LEFT JOIN event_participants ep ON e.id = ep.event_id
+        LEFT JOIN event_stats s ON s.event_id = e.id
         WHERE e.id = ?
-        GROUP BY e.id, e.title
     ''', (event_id,))
     
     result = cursor.fetchone()
@@ -208,13 +396,14 @@ def call_procedure_get_user_activity(user_id):
         SELECT 
             u.id,
             u.name,
-            (SELECT COUNT(*) FROM events WHERE user_id = u.id) as total_events,
-            (SELECT COUNT(*) FROM photos WHERE user_id = u.id) as total_photos,
-            (SELECT COUNT(*) FROM comments WHERE user_id = u.id) as total_comments,
-            (SELECT COUNT(*) FROM likes WHERE user_id = u.id) as total_likes_given,
-            (SELECT COUNT(*) FROM user_follows WHERE follower_id = u.id) as total_following,
-            (SELECT COUNT(*) FROM user_follows WHERE following_id = u.id) as total_followers
+            COALESCE(s.events_count, 0) as total_events,
+            COALESCE(s.photos_count, 0) as total_photos,
+            COALESCE(s.comments_count, 0) as total_comments,
+            COALESCE(s.likes_given_count, 0) as total_likes_given,
+            COALESCE(s.following_count, 0) as total_following,
+            COALESCE(s.followers_count, 0) as total_followers
         FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
         WHERE u.id = ?
     ''', (user_id,))
     
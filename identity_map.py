@@ -0,0 +1,41 @@
+from flask import g, has_request_context
+
+def _current_map():
+    if not has_request_context():
+        return None
+    if 'identity_map' not in g:
+        g.identity_map = {}
+        g.identity_map_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+    return g.identity_map
+
+def get_identity(model, key):
+    identity_map = _current_map()
+    if identity_map is None:
+        return None
+    
+    instance = identity_map.get((model.__name__, key))
+    g.identity_map_stats['hits' if instance is not None else 'misses'] += 1
+    return instance
+
+def add_identity(model, key, instance):
+    identity_map = _current_map()
+    if identity_map is not None and instance is not None:
+        identity_map[(model.__name__, key)] = instance
+    return instance
+
+def discard_identity(model, key):
+    identity_map = _current_map()
+    if identity_map is not None and identity_map.pop((model.__name__, key), None) is not None:
+        g.identity_map_stats['invalidations'] += 1
+
+def clear_identity_map():
+    identity_map = _current_map()
+    if identity_map:
+        g.identity_map_stats['invalidations'] += len(identity_map)
+        identity_map.clear()
+
+def identity_map_stats():
+    identity_map = _current_map()
+    if identity_map is None:
+        return None
+    return dict(g.identity_map_stats, entries=len(identity_map))
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+LISTING_CACHE_TTL = float(os.getenv('LISTING_CACHE_TTL', 30))
+LISTING_CACHE_MAX_ENTRIES = int(os.getenv('LISTING_CACHE_MAX_ENTRIES', 256))
+LISTING_CACHE_GENERATION_FILE = os.getenv(
+    'LISTING_CACHE_GENERATION_FILE',
+    os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), 'cache', 'listings.generation')
+)
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_local_generation = 0
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+def _file_generation():
+    try:
+        return os.stat(LISTING_CACHE_GENERATION_FILE).st_mtime_ns
+    except OSError:
+        return 0
+
+def current_generation():
+    return (_local_generation, _file_generation())
+
+def cached_listing(key, loader):
+    if LISTING_CACHE_TTL <= 0:
+        return loader()
+    
+    generation = current_generation()
+    now = time.monotonic()
+    
+    with _lock:
+        entry = _entries.get(key)
+        if entry and entry[0] == generation and entry[1] > now:
+            _entries.move_to_end(key)
+            _stats['hits'] += 1
+            return entry[2]
+        _stats['misses'] += 1
+    
+    value = loader()
+    
+    with _lock:
+        if generation == current_generation():
+            _entries[key] = (generation, now + LISTING_CACHE_TTL, value)
+            _entries.move_to_end(key)
+            while len(_entries) > LISTING_CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+    
+    return value
+
+def invalidate_listings():
+    global _local_generation
+    
+    with _lock:
+        _local_generation += 1
+        _entries.clear()
+        _stats['invalidations'] += 1
+    
+    try:
+        os.makedirs(os.path.dirname(LISTING_CACHE_GENERATION_FILE) or '.', exist_ok=True)
+        previous = _file_generation()
+        with open(LISTING_CACHE_GENERATION_FILE, 'a'):
+            pass
+        now = max(time.time_ns(), previous + 1)
+        os.utime(LISTING_CACHE_GENERATION_FILE, ns=(now, now))
+    except OSError:
+        pass
+
+def listing_cache_stats():
+    with _lock:
+        return dict(_stats, entries=len(_entries))
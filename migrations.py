@@ -0,0 +1,578 @@
+import logging
+import os
+from database import get_db, get_cursor, write_transaction
+
+MIGRATION_BATCH_SIZE = int(os.getenv('MIGRATION_BATCH_SIZE', 1000))
+
+logger = logging.getLogger(__name__)
+
+def table_columns(cursor, table):
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [row[1] for row in cursor.fetchall()]
+
+def create_base_schema(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            location TEXT NOT NULL,
+            date DATE NOT NULL,
+            visibility TEXT NOT NULL DEFAULT 'private',
+            cover_image TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS photos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            binary_data BLOB,
+            content_type TEXT DEFAULT 'image/jpeg',
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    if 'user_id' not in table_columns(cursor, 'photos'):
+        cursor.execute('ALTER TABLE photos ADD COLUMN user_id INTEGER')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS comments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS likes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            UNIQUE(event_id, user_id)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_follows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            follower_id INTEGER NOT NULL,
+            following_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (follower_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (following_id) REFERENCES users(id) ON DELETE CASCADE,
+            UNIQUE(follower_id, following_id),
+            CHECK(follower_id != following_id)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS event_participants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            UNIQUE(event_id, user_id)
+        )
+    ''')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_user_id ON events(user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_visibility ON events(visibility)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_photos_event_id ON photos(event_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_photos_user_id ON photos(user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_event_id ON comments(event_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_user_id ON comments(user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_likes_event_id ON likes(event_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_likes_user_id ON likes(user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
+
+def backfill_photo_owners(cursor, batch_size):
+    cursor.execute('''
+        UPDATE photos
+        SET user_id = (SELECT user_id FROM events WHERE events.id = photos.event_id)
+        WHERE id IN (
+            SELECT p.id FROM photos p
+            JOIN events e ON e.id = p.event_id
+            WHERE p.user_id IS NULL
+            LIMIT ?
+        )
+    ''', (batch_size,))
+    return cursor.rowcount
+
+def add_photo_storage(cursor):
+    photo_columns = table_columns(cursor, 'photos')
+    
+    if 'sha256' not in photo_columns:
+        cursor.execute('ALTER TABLE photos ADD COLUMN sha256 TEXT')
+    
+    if 'size' not in photo_columns:
+        cursor.execute('ALTER TABLE photos ADD COLUMN size INTEGER')
+    
+    if 'storage' not in photo_columns:
+        cursor.execute("ALTER TABLE photos ADD COLUMN storage TEXT NOT NULL DEFAULT 'database'")
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS photo_blobs (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_photo_blobs_ref_count ON photo_blobs(ref_count)')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_photos_release_blob
+        AFTER DELETE ON photos
+        WHEN OLD.storage = 'filesystem'
+        BEGIN
+            UPDATE photo_blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.sha256;
+        END
+    ''')
+
+def add_photo_thumbnails(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS photo_thumbnails (
+            photo_id INTEGER PRIMARY KEY,
+            binary_data BLOB NOT NULL,
+            content_type TEXT NOT NULL DEFAULT 'image/jpeg',
+            width INTEGER,
+            height INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (photo_id) REFERENCES photos(id) ON DELETE CASCADE
+        )
+    ''')
+
+def add_photos_version(cursor):
+    if 'photos_version' not in table_columns(cursor, 'events'):
+        cursor.execute('ALTER TABLE events ADD COLUMN photos_version INTEGER NOT NULL DEFAULT 0')
+
+def add_upload_sessions(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            total_size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_created_at ON upload_sessions(created_at)')
+
+STATS_TRIGGERS = {
+    'users': {
+        'INSERT': [
+            'INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.id)'
+        ]
+    },
+    'events': {
+        'INSERT': [
+            'INSERT OR IGNORE INTO event_stats (event_id) VALUES (NEW.id)',
+            'UPDATE user_stats SET events_count = events_count + 1 WHERE user_id = NEW.user_id'
+        ],
+        'DELETE': [
+            'UPDATE user_stats SET events_count = events_count - 1 WHERE user_id = OLD.user_id'
+        ]
+    },
+    'photos': {
+        'INSERT': [
+            'UPDATE event_stats SET photos_count = photos_count + 1 WHERE event_id = NEW.event_id',
+            'UPDATE user_stats SET photos_count = photos_count + 1 WHERE user_id = NEW.user_id'
+        ],
+        'DELETE': [
+            'UPDATE event_stats SET photos_count = photos_count - 1 WHERE event_id = OLD.event_id',
+            'UPDATE user_stats SET photos_count = photos_count - 1 WHERE user_id = OLD.user_id'
+        ]
+    },
+    'comments': {
+        'INSERT': [
+            'UPDATE event_stats SET comments_count = comments_count + 1 WHERE event_id = NEW.event_id',
+            'UPDATE user_stats SET comments_count = comments_count + 1 WHERE user_id = NEW.user_id'
+        ],
+        'DELETE': [
+            'UPDATE event_stats SET comments_count = comments_count - 1 WHERE event_id = OLD.event_id',
+            'UPDATE user_stats SET comments_count = comments_count - 1 WHERE user_id = OLD.user_id'
+        ]
+    },
+    'likes': {
+        'INSERT': [
+            'UPDATE event_stats SET likes_count = likes_count + 1 WHERE event_id = NEW.event_id',
+            'UPDATE user_stats SET likes_given_count = likes_given_count + 1 WHERE user_id = NEW.user_id'
+        ],
+        'DELETE': [
+            'UPDATE event_stats SET likes_count = likes_count - 1 WHERE event_id = OLD.event_id',
+            'UPDATE user_stats SET likes_given_count = likes_given_count - 1 WHERE user_id = OLD.user_id'
+        ]
+    },
+    'event_participants': {
+        'INSERT': [
+            'UPDATE event_stats SET participants_count = participants_count + 1 WHERE event_id = NEW.event_id'
+        ],
+        'DELETE': [
+            'UPDATE event_stats SET participants_count = participants_count - 1 WHERE event_id = OLD.event_id'
+        ]
+    },
+    'user_follows': {
+        'INSERT': [
+            'UPDATE user_stats SET following_count = following_count + 1 WHERE user_id = NEW.follower_id',
+            'UPDATE user_stats SET followers_count = followers_count + 1 WHERE user_id = NEW.following_id'
+        ],
+        'DELETE': [
+            'UPDATE user_stats SET following_count = following_count - 1 WHERE user_id = OLD.follower_id',
+            'UPDATE user_stats SET followers_count = followers_count - 1 WHERE user_id = OLD.following_id'
+        ]
+    }
+}
+
+def create_stats_triggers(cursor):
+    for table, actions in STATS_TRIGGERS.items():
+        for action, statements in actions.items():
+            body = ''.join(f'{statement};\n' for statement in statements)
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_{action.lower()}
+                AFTER {action} ON {table}
+                BEGIN
+                    {body}
+                END
+            ''')
+
+def add_stats_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS event_stats (
+            event_id INTEGER PRIMARY KEY,
+            photos_count INTEGER NOT NULL DEFAULT 0,
+            comments_count INTEGER NOT NULL DEFAULT 0,
+            likes_count INTEGER NOT NULL DEFAULT 0,
+            participants_count INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            events_count INTEGER NOT NULL DEFAULT 0,
+            photos_count INTEGER NOT NULL DEFAULT 0,
+            comments_count INTEGER NOT NULL DEFAULT 0,
+            likes_given_count INTEGER NOT NULL DEFAULT 0,
+            following_count INTEGER NOT NULL DEFAULT 0,
+            followers_count INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS event_popularity (
+            event_id INTEGER PRIMARY KEY,
+            event_date DATE NOT NULL,
+            raw_score INTEGER NOT NULL DEFAULT 0,
+            decay_factor REAL NOT NULL DEFAULT 1,
+            score REAL NOT NULL DEFAULT 0,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_event_popularity_score ON event_popularity(score DESC, event_date DESC)')
+    
+    create_stats_triggers(cursor)
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_events_popularity_insert
+        AFTER INSERT ON events
+        WHEN NEW.visibility = 'public'
+        BEGIN
+            INSERT OR IGNORE INTO event_popularity (event_id, event_date) VALUES (NEW.id, NEW.date);
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_events_popularity_update
+        AFTER UPDATE OF visibility, date ON events
+        BEGIN
+            DELETE FROM event_popularity WHERE event_id = OLD.id AND NEW.visibility != 'public';
+            INSERT OR IGNORE INTO event_popularity (event_id, event_date, raw_score, score)
+            SELECT event_id, NEW.date,
+                   likes_count + comments_count * 2 + photos_count,
+                   likes_count + comments_count * 2 + photos_count
+            FROM event_stats
+            WHERE event_id = NEW.id AND NEW.visibility = 'public';
+            UPDATE event_popularity SET event_date = NEW.date WHERE event_id = NEW.id;
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_event_stats_popularity
+        AFTER UPDATE OF likes_count, comments_count, photos_count ON event_stats
+        BEGIN
+            UPDATE event_popularity
+            SET raw_score = NEW.likes_count + NEW.comments_count * 2 + NEW.photos_count,
+                score = (NEW.likes_count + NEW.comments_count * 2 + NEW.photos_count) * decay_factor
+            WHERE event_id = NEW.event_id;
+        END
+    ''')
+    
+    cursor.execute('DELETE FROM event_stats')
+    cursor.execute('''
+        INSERT INTO event_stats (event_id, photos_count, comments_count, likes_count, participants_count)
+        SELECT
+            e.id,
+            (SELECT COUNT(*) FROM photos WHERE event_id = e.id),
+            (SELECT COUNT(*) FROM comments WHERE event_id = e.id),
+            (SELECT COUNT(*) FROM likes WHERE event_id = e.id),
+            (SELECT COUNT(*) FROM event_participants WHERE event_id = e.id)
+        FROM events e
+    ''')
+    
+    cursor.execute('DELETE FROM user_stats')
+    cursor.execute('''
+        INSERT INTO user_stats (user_id, events_count, photos_count, comments_count,
+                                likes_given_count, following_count, followers_count)
+        SELECT
+            u.id,
+            (SELECT COUNT(*) FROM events WHERE user_id = u.id),
+            (SELECT COUNT(*) FROM photos WHERE user_id = u.id),
+            (SELECT COUNT(*) FROM comments WHERE user_id = u.id),
+            (SELECT COUNT(*) FROM likes WHERE user_id = u.id),
+            (SELECT COUNT(*) FROM user_follows WHERE follower_id = u.id),
+            (SELECT COUNT(*) FROM user_follows WHERE following_id = u.id)
+        FROM users u
+    ''')
+    
+    cursor.execute('DELETE FROM event_popularity')
+    cursor.execute('''
+        INSERT INTO event_popularity (event_id, event_date, raw_score, score)
+        SELECT e.id, e.date,
+               s.likes_count + s.comments_count * 2 + s.photos_count,
+               s.likes_count + s.comments_count * 2 + s.photos_count
+        FROM events e
+        JOIN event_stats s ON s.event_id = e.id
+        WHERE e.visibility = 'public'
+    ''')
+
+def add_listing_indexes(cursor):
+    cursor.execute('DROP INDEX IF EXISTS idx_events_user_id')
+    cursor.execute('DROP INDEX IF EXISTS idx_events_visibility')
+    cursor.execute('DROP INDEX IF EXISTS idx_photos_event_id')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_user_date ON events(user_id, date, created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_visibility_date ON events(visibility, date, created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_photos_event_uploaded ON photos(event_id, uploaded_at)')
+
+def add_events_search(cursor):
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+            title, description, location,
+            content='events', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    
+    cursor.execute("INSERT INTO events_fts (events_fts, rank) VALUES ('rank', 'bm25(10.0, 2.0, 4.0)')")
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_events_fts_insert
+        AFTER INSERT ON events
+        BEGIN
+            INSERT INTO events_fts (rowid, title, description, location)
+            VALUES (NEW.id, NEW.title, NEW.description, NEW.location);
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_events_fts_delete
+        AFTER DELETE ON events
+        BEGIN
+            INSERT INTO events_fts (events_fts, rowid, title, description, location)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.location);
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_events_fts_update
+        AFTER UPDATE OF title, description, location ON events
+        BEGIN
+            INSERT INTO events_fts (events_fts, rowid, title, description, location)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.location);
+            INSERT INTO events_fts (rowid, title, description, location)
+            VALUES (NEW.id, NEW.title, NEW.description, NEW.location);
+        END
+    ''')
+    
+    rebuild_search_index(cursor)
+
+def rebuild_search_index(cursor):
+    cursor.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+
+def add_follower_feed(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feed_items (
+            user_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            author_id INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (user_id, event_id),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_feed_items_user_created ON feed_items(user_id, created_at, event_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_feed_items_user_author ON feed_items(user_id, author_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_feed_items_event_id ON feed_items(event_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_follows_following_id ON user_follows(following_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_user_visibility_created ON events(user_id, visibility, created_at)')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_events_feed_insert
+        AFTER INSERT ON events
+        WHEN NEW.visibility = 'public'
+        BEGIN
+            INSERT OR IGNORE INTO feed_items (user_id, event_id, author_id, created_at)
+            SELECT follower_id, NEW.id, NEW.user_id, NEW.created_at
+            FROM user_follows WHERE following_id = NEW.user_id;
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_events_feed_publish
+        AFTER UPDATE OF visibility ON events
+        WHEN NEW.visibility = 'public' AND OLD.visibility != 'public'
+        BEGIN
+            INSERT OR IGNORE INTO feed_items (user_id, event_id, author_id, created_at)
+            SELECT follower_id, NEW.id, NEW.user_id, NEW.created_at
+            FROM user_follows WHERE following_id = NEW.user_id;
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_events_feed_unpublish
+        AFTER UPDATE OF visibility ON events
+        WHEN NEW.visibility != 'public' AND OLD.visibility = 'public'
+        BEGIN
+            DELETE FROM feed_items WHERE event_id = NEW.id;
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_user_follows_feed_insert
+        AFTER INSERT ON user_follows
+        BEGIN
+            INSERT OR IGNORE INTO feed_items (user_id, event_id, author_id, created_at)
+            SELECT NEW.follower_id, id, user_id, created_at
+            FROM events WHERE user_id = NEW.following_id AND visibility = 'public';
+        END
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_user_follows_feed_delete
+        AFTER DELETE ON user_follows
+        BEGIN
+            DELETE FROM feed_items WHERE user_id = OLD.follower_id AND author_id = OLD.following_id;
+        END
+    ''')
+    
+    cursor.execute('''
+        INSERT OR IGNORE INTO feed_items (user_id, event_id, author_id, created_at)
+        SELECT f.follower_id, e.id, e.user_id, e.created_at
+        FROM user_follows f
+        JOIN events e ON e.user_id = f.following_id
+        WHERE e.visibility = 'public'
+    ''')
+
+def add_comments_listing_index(cursor):
+    cursor.execute('DROP INDEX IF EXISTS idx_comments_event_id')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_comments_event_created ON comments(event_id, created_at)')
+
+def add_upload_sessions_indexes(cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_event_id ON upload_sessions(event_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_user_id ON upload_sessions(user_id)')
+
+def add_event_participants_user_index(cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_event_participants_user_id ON event_participants(user_id)')
+
+MIGRATIONS = [
+    (1, create_base_schema, False),
+    (2, backfill_photo_owners, True),
+    (3, add_photo_storage, False),
+    (4, add_photo_thumbnails, False),
+    (5, add_photos_version, False),
+    (6, add_upload_sessions, False),
+    (7, add_stats_tables, False),
+    (8, add_listing_indexes, False),
+    (9, add_events_search, False),
+    (10, add_follower_feed, False),
+    (11, add_comments_listing_index, False),
+    (12, add_upload_sessions_indexes, False),
+    (13, add_event_participants_user_index, False)
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def read_version(cursor):
+    cursor.execute('PRAGMA user_version')
+    return cursor.fetchone()[0]
+
+def schema_version():
+    return read_version(get_cursor(get_db()))
+
+def apply_migration(version, step, batched, batch_size):
+    while True:
+        with write_transaction() as conn:
+            cursor = get_cursor(conn)
+            
+            if read_version(cursor) >= version:
+                return False
+            
+            if batched and step(cursor, batch_size):
+                continue
+            if not batched:
+                step(cursor)
+            
+            cursor.execute(f'PRAGMA user_version = {version}')
+            return True
+
+def migrate(batch_size=MIGRATION_BATCH_SIZE):
+    if schema_version() >= SCHEMA_VERSION:
+        return 0
+    
+    applied = 0
+    for version, step, batched in MIGRATIONS:
+        try:
+            if apply_migration(version, step, batched, batch_size):
+                logger.info('Migração %s (%s) aplicada', version, step.__name__)
+                applied += 1
+        except Exception:
+            logger.exception('Erro ao aplicar a migração %s (%s)', version, step.__name__)
+            raise
+    
+    return applied
@@ -1,5 +1,10 @@
 from models.user import User
 from models.event import Event
 from models.photo import Photo
+from models.thumbnail import Thumbnail
+from models.upload_session import UploadSession
+from models.follow import Follow
+from models.like import Like
+from models.comment import Comment
 
-__all__ = ['User', 'Event', 'Photo']
+__all__ = ['User', 'Event', 'Photo', 'Thumbnail', 'UploadSession', 'Follow', 'Like', 'Comment']
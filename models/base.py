@@ -0,0 +1,68 @@
+class Model:
+    
+    __slots__ = ()
+    _fields = {}
+    _aggregates = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._mappers = {}
+    
+    def __init__(self, **values):
+        for name, default in self._fields.items():
+            value = values.pop(name, None)
+            setattr(self, name, default if value is None else value)
+        
+        for name in self._aggregates:
+            setattr(self, name, values.pop(name, None))
+        
+        if values:
+            raise TypeError(f"{type(self).__name__} não possui o(s) campo(s): {', '.join(values)}")
+    
+    @classmethod
+    def _mapper(cls, keys):
+        mapper = cls._mappers.get(keys)
+        
+        if mapper is None:
+            columns = []
+            for index, key in enumerate(keys):
+                if key in cls._fields:
+                    columns.append((index, key, cls._fields[key]))
+                elif key in cls._aggregates:
+                    columns.append((index, key, None))
+            
+            mapped = {name for _, name, _ in columns}
+            missing = [(name, default) for name, default in cls._fields.items() if name not in mapped]
+            missing += [(name, None) for name in cls._aggregates if name not in mapped]
+            
+            mapper = (tuple(columns), tuple(missing))
+            cls._mappers[keys] = mapper
+        
+        return mapper
+    
+    @classmethod
+    def _map(cls, mapper, row):
+        columns, missing = mapper
+        instance = cls.__new__(cls)
+        
+        for name, default in missing:
+            setattr(instance, name, default)
+        
+        for index, name, default in columns:
+            value = row[index]
+            setattr(instance, name, default if value is None else value)
+        
+        return instance
+    
+    @classmethod
+    def from_row(cls, row):
+        if row is None:
+            return None
+        return cls._map(cls._mapper(tuple(row.keys())), row)
+    
+    @classmethod
+    def from_rows(cls, rows):
+        if not rows:
+            return []
+        mapper = cls._mapper(tuple(rows[0].keys()))
+        return [cls._map(mapper, row) for row in rows]
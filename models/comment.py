@@ -0,0 +1,77 @@
+from database import get_db, get_cursor, run_write
+from models.base import Model
+from pagination import decode_cursor
+from identity_map import get_identity, add_identity, discard_identity
+
+class Comment(Model):
+    
+    _fields = {
+        'id': None,
+        'event_id': None,
+        'user_id': None,
+        'content': None,
+        'created_at': None
+    }
+    _aggregates = ('user_name',)
+    __slots__ = tuple(_fields) + _aggregates
+    
+    @staticmethod
+    def create(event_id, user_id, content):
+        def insert(conn):
+            cursor = get_cursor(conn)
+            cursor.execute('''
+                INSERT INTO comments (event_id, user_id, content)
+                VALUES (?, ?, ?)
+                RETURNING *
+            ''', (event_id, user_id, content))
+            return Comment.from_row(cursor.fetchone())
+        
+        try:
+            return run_write(insert)
+        except Exception as e:
+            return None
+    
+    @staticmethod
+    def find_by_id(comment_id):
+        comment = get_identity(Comment, comment_id)
+        if comment:
+            return comment
+        
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('SELECT * FROM comments WHERE id = ?', (comment_id,))
+        return add_identity(Comment, comment_id, Comment.from_row(cursor.fetchone()))
+    
+    @staticmethod
+    def page_key(comment):
+        return (comment.created_at, comment.id)
+    
+    @staticmethod
+    def find_by_event(event_id, limit=20, after=None):
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        query = '''
+            SELECT c.*, u.name as user_name
+            FROM comments c
+            JOIN users u ON u.id = c.user_id
+            WHERE c.event_id = ?
+        '''
+        params = [event_id]
+        
+        after = decode_cursor(after, 2)
+        if after:
+            query += ' AND (c.created_at, c.id) > (?, ?)'
+            params.extend(after)
+        
+        query += ' ORDER BY c.created_at, c.id LIMIT ?'
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        return Comment.from_rows(cursor.fetchall())
+    
+    def delete(self):
+        run_write(lambda conn: conn.execute('DELETE FROM comments WHERE id = ?', (self.id,)))
+        discard_identity(Comment, self.id)
+        return True
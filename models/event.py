@@ -1,143 +1,190 @@
-from database import get_db, get_cursor
+from database import get_db, get_cursor, run_write
+from models.base import Model
+from pagination import decode_cursor
+from storage import get_filesystem_storage
+from archive import remove_cached_archives
+from listing_cache import invalidate_listings
+from identity_map import get_identity, add_identity, clear_identity_map
+import re
 
-class Event:
-    
-    def __init__(self, id=None, user_id=None, title=None, description=None, 
-                 location=None, date=None, visibility='private', 
-                 cover_image=None, created_at=None):
-        self.id = id
-        self.user_id = user_id
-        self.title = title
-        self.description = description
-        self.location = location
-        self.date = date
-        self.visibility = visibility
-        self.cover_image = cover_image
-        self.created_at = created_at
+class Event(Model):
+    
+    _fields = {
+        'id': None,
+        'user_id': None,
+        'title': None,
+        'description': None,
+        'location': None,
+        'date': None,
+        'visibility': 'private',
+        'cover_image': None,
+        'created_at': None,
+        'photos_version': 0
+    }
+    _aggregates = ('user_name', 'likes_count', 'comments_count', 'photos_count', 'popularity_score', 'search_rank')
+    __slots__ = tuple(_fields) + _aggregates
     
     @staticmethod
     def create(user_id, title, description, location, date, visibility='private', cover_image=None):
-        conn = get_db()
-        cursor = get_cursor(conn)
-        
-        try:
+        def insert(conn):
+            cursor = get_cursor(conn)
             cursor.execute('''
                 INSERT INTO events (user_id, title, description, location, date, visibility, cover_image)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (user_id, title, description, location, date, visibility, cover_image))
-            event_id = cursor.lastrowid
-            
-            conn.commit()
-            
-            cursor.execute('SELECT * FROM events WHERE id = ?', (event_id,))
-            row = cursor.fetchone()
-            
-            if row:
-                return Event(
-                    id=row['id'],
-                    user_id=row['user_id'],
-                    title=row['title'],
-                    description=row['description'],
-                    location=row['location'],
-                    date=row['date'],
-                    visibility=row['visibility'],
-                    cover_image=row['cover_image'],
-                    created_at=row['created_at']
-                )
-            return None
+            return cursor.lastrowid
+        
+        try:
+            event_id = run_write(insert)
+            invalidate_listings()
+            return Event.find_by_id(event_id)
         except Exception as e:
             return None
     
     @staticmethod
     def find_by_id(event_id):
+        event = get_identity(Event, event_id)
+        if event:
+            return event
+        
         conn = get_db()
         cursor = get_cursor(conn)
         
         cursor.execute('SELECT * FROM events WHERE id = ?', (event_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            return Event(
-                id=row['id'],
-                user_id=row['user_id'],
-                title=row['title'],
-                description=row['description'],
-                location=row['location'],
-                date=row['date'],
-                visibility=row['visibility'],
-                cover_image=row['cover_image'],
-                created_at=row['created_at']
-            )
-        return None
+        return add_identity(Event, event_id, Event.from_row(cursor.fetchone()))
     
     @staticmethod
-    def find_by_user(user_id):
+    def page_key(event):
+        return (event.date, event.created_at, event.id)
+    
+    @staticmethod
+    def find_by_user(user_id, limit=None, after=None):
         conn = get_db()
         cursor = get_cursor(conn)
         
-        cursor.execute('''
+        query = '''
             SELECT * FROM events 
             WHERE user_id = ? 
-            ORDER BY date DESC, created_at DESC
-        ''', (user_id,))
-        
-        rows = cursor.fetchall()
-        
-        events = []
-        for row in rows:
-            events.append(Event(
-                id=row['id'],
-                user_id=row['user_id'],
-                title=row['title'],
-                description=row['description'],
-                location=row['location'],
-                date=row['date'],
-                visibility=row['visibility'],
-                cover_image=row['cover_image'],
-                created_at=row['created_at']
-            ))
-        
-        return events
+        '''
+        params = [user_id]
+        
+        after = decode_cursor(after, 3)
+        if after:
+            query += ' AND (date, created_at, id) < (?, ?, ?)'
+            params.extend(after)
+        
+        query += ' ORDER BY date DESC, created_at DESC, id DESC LIMIT ?'
+        params.append(-1 if limit is None else limit)
+        
+        cursor.execute(query, params)
+        
+        return Event.from_rows(cursor.fetchall())
     
     @staticmethod
-    def find_public_events(limit=20):
+    def find_public_events(limit=20, after=None):
         conn = get_db()
         cursor = get_cursor(conn)
         
-        cursor.execute('''
+        query = '''
             SELECT e.*, u.name as user_name,
-                   (SELECT COUNT(*) FROM likes WHERE event_id = e.id) as likes_count,
-                   (SELECT COUNT(*) FROM comments WHERE event_id = e.id) as comments_count,
-                   (SELECT COUNT(*) FROM photos WHERE event_id = e.id) as photos_count
+                   COALESCE(s.likes_count, 0) as likes_count,
+                   COALESCE(s.comments_count, 0) as comments_count,
+                   COALESCE(s.photos_count, 0) as photos_count
             FROM events e
             JOIN users u ON e.user_id = u.id
+            LEFT JOIN event_stats s ON s.event_id = e.id
             WHERE e.visibility = 'public'
-            ORDER BY e.date DESC, e.created_at DESC
-            LIMIT ?
-        ''', (limit,))
+        '''
+        params = []
+        
+        after = decode_cursor(after, 3)
+        if after:
+            query += ' AND (e.date, e.created_at, e.id) < (?, ?, ?)'
+            params.extend(after)
+        
+        query += ' ORDER BY e.date DESC, e.created_at DESC, e.id DESC LIMIT ?'
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        
+        return Event.from_rows(cursor.fetchall())
+    
+    @staticmethod
+    def find_feed(user_id, limit=20, after=None):
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        query = '''
+            SELECT e.*, u.name as user_name,
+                   COALESCE(s.likes_count, 0) as likes_count,
+                   COALESCE(s.comments_count, 0) as comments_count,
+                   COALESCE(s.photos_count, 0) as photos_count
+            FROM feed_items f
+            JOIN events e ON e.id = f.event_id
+            JOIN users u ON u.id = f.author_id
+            LEFT JOIN event_stats s ON s.event_id = f.event_id
+            WHERE f.user_id = ?
+        '''
+        params = [user_id]
+        
+        after = decode_cursor(after, 2)
+        if after:
+            query += ' AND (f.created_at, f.event_id) < (?, ?)'
+            params.extend(after)
+        
+        query += ' ORDER BY f.created_at DESC, f.event_id DESC LIMIT ?'
+        params.append(limit)
         
-        rows = cursor.fetchall()
-        
-        events = []
-        for row in rows:
-            event = Event(
-                id=row['id'],
-                user_id=row['user_id'],
-                title=row['title'],
-                description=row['description'],
-                location=row['location'],
-                date=row['date'],
-                visibility=row['visibility'],
-                cover_image=row['cover_image'],
-                created_at=row['created_at']
-            )
-            event.user_name = row['user_name']
-            event.likes_count = row['likes_count']
-            event.comments_count = row['comments_count']
-            event.photos_count = row['photos_count']
-            events.append(event)
-        
-        return events
+        cursor.execute(query, params)
+        return Event.from_rows(cursor.fetchall())
+    
+    @staticmethod
+    def feed_key(event):
+        return (event.created_at, event.id)
+    
+    @staticmethod
+    def search_key(event):
+        return (event.search_rank, event.id)
+    
+    @staticmethod
+    def match_expression(text):
+        terms = re.findall(r'\w+', text or '')
+        return ' '.join(f'"{term}"*' for term in terms)
+    
+    @staticmethod
+    def search(text, user_id=None, limit=20, after=None):
+        match = Event.match_expression(text)
+        if not match:
+            return []
+        
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        query = '''
+            SELECT e.*, u.name as user_name,
+                   COALESCE(s.likes_count, 0) as likes_count,
+                   COALESCE(s.comments_count, 0) as comments_count,
+                   COALESCE(s.photos_count, 0) as photos_count,
+                   f.rank as search_rank
+            FROM events_fts f
+            JOIN events e ON e.id = f.rowid
+            JOIN users u ON e.user_id = u.id
+            LEFT JOIN event_stats s ON s.event_id = e.id
+            WHERE events_fts MATCH ?
+              AND (e.visibility = 'public' OR e.user_id = ?)
+        '''
+        params = [match, user_id]
+        
+        after = decode_cursor(after, 2)
+        if after:
+            query += ' AND (f.rank, e.id) > (?, ?)'
+            params.extend(after)
+        
+        query += ' ORDER BY f.rank, e.id LIMIT ?'
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        return Event.from_rows(cursor.fetchall())
     
     @staticmethod
     def find_popular_events(limit=10):
@@ -146,50 +193,22 @@ class Event:
         
         cursor.execute('''
             SELECT e.*, u.name as user_name,
-                   COUNT(DISTINCT l.id) as likes_count,
-                   COUNT(DISTINCT c.id) as comments_count,
-                   COUNT(DISTINCT p.id) as photos_count,
-                   (COUNT(DISTINCT l.id) + COUNT(DISTINCT c.id) * 2 + COUNT(DISTINCT p.id)) as popularity_score
-            FROM events e
+                   s.likes_count, s.comments_count, s.photos_count,
+                   p.raw_score as popularity_score
+            FROM event_popularity p
+            JOIN events e ON e.id = p.event_id
             JOIN users u ON e.user_id = u.id
-            LEFT JOIN likes l ON e.id = l.event_id
-            LEFT JOIN comments c ON e.id = c.event_id
-            LEFT JOIN photos p ON e.id = p.event_id
-            WHERE e.visibility = 'public'
-            GROUP BY e.id, e.title, e.description, e.location, e.date, e.visibility, e.cover_image, e.created_at, e.user_id, u.name
-            ORDER BY popularity_score DESC, e.date DESC
+            JOIN event_stats s ON s.event_id = p.event_id
+            ORDER BY p.score DESC, p.event_date DESC
             LIMIT ?
         ''', (limit,))
         
-        rows = cursor.fetchall()
-        
-        events = []
-        for row in rows:
-            event = Event(
-                id=row['id'],
-                user_id=row['user_id'],
-                title=row['title'],
-                description=row['description'],
-                location=row['location'],
-                date=row['date'],
-                visibility=row['visibility'],
-                cover_image=row['cover_image'],
-                created_at=row['created_at']
-            )
-            event.user_name = row['user_name']
-            event.likes_count = row['likes_count']
-            event.comments_count = row['comments_count']
-            event.photos_count = row['photos_count']
-            event.popularity_score = row['popularity_score']
-            events.append(event)
-        
-        return events
+        return Event.from_rows(cursor.fetchall())
     
     def update(self, title, description, location, date, visibility, cover_image=None):
-        conn = get_db()
-        cursor = get_cursor(conn)
-        
-        try:
+        def save(conn):
+            cursor = get_cursor(conn)
+            
             if cover_image:
                 cursor.execute('''
                     UPDATE events 
@@ -203,8 +222,10 @@ class Event:
                     SET title = ?, description = ?, location = ?, date = ?, visibility = ?
                     WHERE id = ?
                 ''', (title, description, location, date, visibility, self.id))
-            
-            conn.commit()
+        
+        try:
+            run_write(save)
+            invalidate_listings()
             
             self.title = title
             self.description = description
@@ -213,18 +234,33 @@ class Event:
             self.visibility = visibility
             if cover_image:
                 self.cover_image = cover_image
+            add_identity(Event, self.id, self)
             
             return True
         except Exception as e:
             return False
     
     def delete(self):
+        run_write(lambda conn: conn.execute('DELETE FROM events WHERE id = ?', (self.id,)))
+        invalidate_listings()
+        clear_identity_map()
+        
+        get_filesystem_storage().collect_garbage()
+        remove_cached_archives(self.id)
+        return True
+    
+    @staticmethod
+    def find_photos_version(event_id):
         conn = get_db()
         cursor = get_cursor(conn)
         
-        cursor.execute('DELETE FROM events WHERE id = ?', (self.id,))
-        conn.commit()
-        return True
+        cursor.execute('SELECT photos_version FROM events WHERE id = ?', (event_id,))
+        row = cursor.fetchone()
+        return row['photos_version'] if row else None
+    
+    @staticmethod
+    def bump_photos_version(cursor, event_id):
+        cursor.execute('UPDATE events SET photos_version = photos_version + 1 WHERE id = ?', (event_id,))
     
     def is_owner(self, user_id):
         return self.user_id == user_id
@@ -0,0 +1,44 @@
+from database import get_db, get_cursor, run_write
+from models.base import Model
+import sqlite3
+
+class Follow(Model):
+    
+    _fields = {
+        'id': None,
+        'follower_id': None,
+        'following_id': None,
+        'created_at': None
+    }
+    __slots__ = tuple(_fields)
+    
+    @staticmethod
+    def create(follower_id, following_id):
+        def insert(conn):
+            cursor = get_cursor(conn)
+            cursor.execute('''
+                INSERT INTO user_follows (follower_id, following_id)
+                VALUES (?, ?)
+                RETURNING *
+            ''', (follower_id, following_id))
+            return Follow.from_row(cursor.fetchone())
+        
+        try:
+            return run_write(insert)
+        except sqlite3.IntegrityError:
+            return None
+    
+    @staticmethod
+    def find(follower_id, following_id):
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('''
+            SELECT * FROM user_follows
+            WHERE follower_id = ? AND following_id = ?
+        ''', (follower_id, following_id))
+        return Follow.from_row(cursor.fetchone())
+    
+    def delete(self):
+        run_write(lambda conn: conn.execute('DELETE FROM user_follows WHERE id = ?', (self.id,)))
+        return True
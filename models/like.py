@@ -0,0 +1,42 @@
+from database import get_db, get_cursor, run_write
+from models.base import Model
+
+class Like(Model):
+    
+    _fields = {
+        'id': None,
+        'event_id': None,
+        'user_id': None,
+        'created_at': None
+    }
+    __slots__ = tuple(_fields)
+    
+    @staticmethod
+    def create(event_id, user_id):
+        def insert(conn):
+            cursor = get_cursor(conn)
+            cursor.execute('''
+                INSERT INTO likes (event_id, user_id)
+                VALUES (?, ?)
+                ON CONFLICT(event_id, user_id) DO NOTHING
+            ''', (event_id, user_id))
+            return cursor.rowcount > 0
+        
+        return run_write(insert)
+    
+    @staticmethod
+    def delete_by_user(event_id, user_id):
+        def delete(conn):
+            cursor = get_cursor(conn)
+            cursor.execute('DELETE FROM likes WHERE event_id = ? AND user_id = ?', (event_id, user_id))
+            return cursor.rowcount > 0
+        
+        return run_write(delete)
+    
+    @staticmethod
+    def exists(event_id, user_id):
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('SELECT 1 FROM likes WHERE event_id = ? AND user_id = ?', (event_id, user_id))
+        return cursor.fetchone() is not None
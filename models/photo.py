@@ -1,77 +1,138 @@
-from database import get_db, get_cursor
+from database import get_db, get_cursor, run_write
+from models.base import Model
+from models.event import Event
+from listing_cache import invalidate_listings
+from identity_map import get_identity, add_identity, discard_identity
+from storage import get_photo_storage, get_filesystem_storage, FileSystemStorage
+from datetime import datetime, timezone
+import hashlib
 
-class Photo:
+PHOTO_CHUNK_SIZE = 64 * 1024
+
+class Photo(Model):
+    
+    _fields = {
+        'id': None,
+        'event_id': None,
+        'user_id': None,
+        'filename': None,
+        'binary_data': None,
+        'content_type': 'image/jpeg',
+        'sha256': None,
+        'size': None,
+        'storage': 'database',
+        'uploaded_at': None
+    }
+    __slots__ = tuple(_fields)
+    
+    @property
+    def etag(self):
+        return self.sha256 or f'photo-{self.id}'
+    
+    @property
+    def last_modified(self):
+        if not self.uploaded_at:
+            return None
+        try:
+            return datetime.strptime(str(self.uploaded_at), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
     
-    def __init__(self, id=None, event_id=None, filename=None, binary_data=None, content_type=None, uploaded_at=None):
-        self.id = id
-        self.event_id = event_id
-        self.filename = filename
-        self.binary_data = binary_data
-        self.content_type = content_type or 'image/jpeg'
-        self.uploaded_at = uploaded_at
+    @property
+    def path(self):
+        if self.storage != FileSystemStorage.name:
+            return None
+        return get_filesystem_storage().path_for(self.sha256)
     
     @staticmethod
     def create(event_id, user_id, filename, binary_data, content_type='image/jpeg'):
-        conn = get_db()
-        cursor = get_cursor(conn)
+        return Photo.create_many(event_id, user_id, [(filename, binary_data, content_type)])[0]
+    
+    @staticmethod
+    def create_many(event_id, user_id, files):
+        storage = get_photo_storage()
+        prepared = []
         
-        try:
-            cursor.execute('''
-                INSERT INTO photos (event_id, user_id, filename, binary_data, content_type)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (event_id, user_id, filename, binary_data, content_type))
-            photo_id = cursor.lastrowid
-            
-            conn.commit()
-            
-            cursor.execute('SELECT * FROM photos WHERE id = ?', (photo_id,))
-            row = cursor.fetchone()
+        for filename, binary_data, content_type in files:
+            sha256 = hashlib.sha256(binary_data).hexdigest()
+            try:
+                storage.prepare(sha256, binary_data)
+                prepared.append((filename, binary_data, content_type, sha256))
+            except Exception as e:
+                prepared.append(None)
+        
+        def insert_all(conn):
+            cursor = get_cursor(conn)
+            photos = []
             
-            if row:
-                binary_data = row['binary_data']
-                if binary_data is not None:
-                    if isinstance(binary_data, memoryview):
-                        binary_data = bytes(binary_data)
-                    elif not isinstance(binary_data, bytes):
-                        binary_data = bytes(binary_data)
+            for item in prepared:
+                if item is None:
+                    photos.append(None)
+                    continue
+                
+                filename, binary_data, content_type, sha256 = item
+                cursor.execute('SAVEPOINT photo_create')
+                try:
+                    stored_data = storage.store(cursor, sha256, binary_data)
+                    
+                    cursor.execute('''
+                        INSERT INTO photos (event_id, user_id, filename, binary_data, content_type, sha256, size, storage)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        RETURNING id, uploaded_at
+                    ''', (event_id, user_id, filename, stored_data, content_type, sha256, len(binary_data), storage.name))
+                    row = cursor.fetchone()
+                    cursor.execute('RELEASE photo_create')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO photo_create')
+                    cursor.execute('RELEASE photo_create')
+                    photos.append(None)
+                    continue
                 
-                return Photo(
+                photos.append(Photo(
                     id=row['id'],
-                    event_id=row['event_id'],
-                    filename=row['filename'],
-                    binary_data=binary_data,
-                    content_type=row['content_type'] if row['content_type'] else 'image/jpeg',
-                    uploaded_at=row['uploaded_at']
-                )
-            return None
+                    event_id=event_id,
+                    user_id=user_id,
+                    filename=filename,
+                    content_type=content_type or 'image/jpeg',
+                    uploaded_at=row['uploaded_at'],
+                    size=len(binary_data),
+                    sha256=sha256,
+                    storage=storage.name
+                ))
+            
+            if any(photos):
+                Event.bump_photos_version(cursor, event_id)
+            
+            return photos
+        
+        try:
+            photos = run_write(insert_all)
         except Exception as e:
-            return None
+            photos = [None] * len(files)
+        
+        failed = [item[3] for item, photo in zip(prepared, photos) if item and photo is None]
+        if failed:
+            storage.discard_unreferenced(failed)
+        
+        if any(photos):
+            invalidate_listings()
+            discard_identity(Event, event_id)
+        return photos
     
     @staticmethod
     def find_by_id(photo_id):
-        conn = get_db()
-        cursor = get_cursor(conn)
-        
-        cursor.execute('SELECT * FROM photos WHERE id = ?', (photo_id,))
-        row = cursor.fetchone()
+        photo = get_identity(Photo, photo_id)
         
-        if row:
-            binary_data = row['binary_data']
-            if binary_data is not None:
-                if isinstance(binary_data, memoryview):
-                    binary_data = bytes(binary_data)
-                elif not isinstance(binary_data, bytes):
-                    binary_data = bytes(binary_data)
+        if not photo:
+            conn = get_db()
+            cursor = get_cursor(conn)
             
-            return Photo(
-                id=row['id'],
-                event_id=row['event_id'],
-                filename=row['filename'],
-                binary_data=binary_data,
-                content_type=row['content_type'] if row['content_type'] else 'image/jpeg',
-                uploaded_at=row['uploaded_at']
-            )
-        return None
+            cursor.execute('SELECT * FROM photos WHERE id = ?', (photo_id,))
+            photo = add_identity(Photo, photo_id, Photo.from_row(cursor.fetchone()))
+        
+        if photo:
+            photo.load_binary_data()
+        return photo
     
     @staticmethod
     def find_by_event(event_id):
@@ -84,32 +145,125 @@ class Photo:
             ORDER BY uploaded_at DESC
         ''', (event_id,))
         
-        rows = cursor.fetchall()
+        photos = Photo.from_rows(cursor.fetchall())
         
-        photos = []
-        for row in rows:
-            binary_data = row['binary_data']
-            if binary_data is not None:
-                if isinstance(binary_data, memoryview):
-                    binary_data = bytes(binary_data)
-                elif not isinstance(binary_data, bytes):
-                    binary_data = bytes(binary_data)
-            
-            photos.append(Photo(
-                id=row['id'],
-                event_id=row['event_id'],
-                filename=row['filename'],
-                binary_data=binary_data,
-                content_type=row['content_type'] if row['content_type'] else 'image/jpeg',
-                uploaded_at=row['uploaded_at']
-            ))
+        for photo in photos:
+            photo.load_binary_data()
         
         return photos
     
-    def delete(self):
+    @staticmethod
+    def find_metadata_by_id(photo_id):
+        photo = get_identity(Photo, photo_id)
+        if photo:
+            return photo
+        
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('''
+            SELECT id, event_id, user_id, filename, content_type, sha256, storage, uploaded_at,
+                   COALESCE(size, length(binary_data)) as size
+            FROM photos 
+            WHERE id = ?
+        ''', (photo_id,))
+        return add_identity(Photo, photo_id, Photo.from_row(cursor.fetchone()))
+    
+    @staticmethod
+    def find_metadata_by_event(event_id):
         conn = get_db()
         cursor = get_cursor(conn)
         
-        cursor.execute('DELETE FROM photos WHERE id = ?', (self.id,))
-        conn.commit()
+        cursor.execute('''
+            SELECT id, event_id, user_id, filename, content_type, sha256, storage, uploaded_at,
+                   COALESCE(size, length(binary_data)) as size
+            FROM photos 
+            WHERE event_id = ? 
+            ORDER BY uploaded_at DESC
+        ''', (event_id,))
+        
+        return Photo.from_rows(cursor.fetchall())
+    
+    def load_binary_data(self):
+        if self.binary_data is not None:
+            return self.binary_data
+        
+        if self.storage == FileSystemStorage.name:
+            self.binary_data = get_filesystem_storage().read(self.sha256)
+            self.size = len(self.binary_data)
+            return self.binary_data
+        
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('SELECT binary_data FROM photos WHERE id = ?', (self.id,))
+        row = cursor.fetchone()
+        
+        if row and row['binary_data'] is not None:
+            binary_data = row['binary_data']
+            if not isinstance(binary_data, bytes):
+                binary_data = bytes(binary_data)
+            self.binary_data = binary_data
+            self.size = len(binary_data)
+        
+        return self.binary_data
+    
+    def iter_binary_data(self, start=0, end=None, chunk_size=PHOTO_CHUNK_SIZE):
+        if end is None:
+            end = self.size or 0
+        
+        if self.storage == FileSystemStorage.name:
+            with open(self.path, 'rb') as photo_file:
+                photo_file.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    chunk = photo_file.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+            return
+        
+        conn = get_db()
+        
+        if hasattr(conn, 'blobopen'):
+            with conn.blobopen('photos', 'binary_data', self.id, readonly=True) as blob:
+                blob.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    chunk = blob.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+            return
+        
+        cursor = get_cursor(conn)
+        offset = start
+        while offset < end:
+            length = min(chunk_size, end - offset)
+            cursor.execute(
+                'SELECT substr(binary_data, ?, ?) as chunk FROM photos WHERE id = ?',
+                (offset + 1, length, self.id)
+            )
+            row = cursor.fetchone()
+            if not row or not row['chunk']:
+                break
+            chunk = bytes(row['chunk'])
+            offset += len(chunk)
+            yield chunk
+    
+    def delete(self):
+        def delete(conn):
+            cursor = get_cursor(conn)
+            cursor.execute('DELETE FROM photos WHERE id = ?', (self.id,))
+            Event.bump_photos_version(cursor, self.event_id)
+        
+        run_write(delete)
+        invalidate_listings()
+        discard_identity(Photo, self.id)
+        discard_identity(Event, self.event_id)
+        
+        if self.storage == FileSystemStorage.name:
+            get_filesystem_storage().collect_garbage()
         return True
@@ -0,0 +1,56 @@
+from database import get_db, get_cursor, run_write
+from models.base import Model
+
+class Thumbnail(Model):
+    
+    _fields = {
+        'photo_id': None,
+        'binary_data': None,
+        'content_type': 'image/jpeg',
+        'width': None,
+        'height': None,
+        'created_at': None
+    }
+    __slots__ = tuple(_fields)
+    
+    @property
+    def etag(self):
+        return f'thumb-{self.photo_id}-{self.width}x{self.height}'
+    
+    @staticmethod
+    def save(photo_id, binary_data, width, height, content_type='image/jpeg'):
+        def insert(conn):
+            cursor = get_cursor(conn)
+            cursor.execute('''
+                INSERT OR REPLACE INTO photo_thumbnails (photo_id, binary_data, content_type, width, height)
+                SELECT id, ?, ?, ?, ? FROM photos WHERE id = ?
+            ''', (binary_data, content_type, width, height, photo_id))
+            return cursor.rowcount > 0
+        
+        try:
+            return run_write(insert)
+        except Exception as e:
+            return False
+    
+    @staticmethod
+    def find_by_photo_id(photo_id):
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('SELECT * FROM photo_thumbnails WHERE photo_id = ?', (photo_id,))
+        return Thumbnail.from_row(cursor.fetchone())
+    
+    @staticmethod
+    def find_missing_photo_ids(after_id=0, limit=100):
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('''
+            SELECT p.id FROM photos p
+            LEFT JOIN photo_thumbnails t ON t.photo_id = p.id
+            WHERE t.photo_id IS NULL AND p.id > ?
+            ORDER BY p.id
+            LIMIT ?
+        ''', (after_id, limit))
+        
+        return [row['id'] for row in cursor.fetchall()]
@@ -0,0 +1,134 @@
+from database import get_db, get_cursor, run_write
+from models.base import Model
+from identity_map import get_identity, add_identity, discard_identity
+from contextlib import contextmanager
+import os
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+UPLOAD_CHUNK_FOLDER = os.getenv(
+    'UPLOAD_CHUNK_FOLDER',
+    os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), 'chunks')
+)
+UPLOAD_SESSION_MAX_AGE_HOURS = int(os.getenv('UPLOAD_SESSION_MAX_AGE_HOURS', 24))
+
+_part_lock = threading.Lock()
+
+class UploadSession(Model):
+    
+    _fields = {
+        'id': None,
+        'event_id': None,
+        'user_id': None,
+        'filename': None,
+        'total_size': None,
+        'created_at': None
+    }
+    __slots__ = tuple(_fields)
+    
+    @property
+    def path(self):
+        return os.path.join(UPLOAD_CHUNK_FOLDER, f'{self.id}.part')
+    
+    @property
+    def received_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+    
+    @property
+    def is_complete(self):
+        return self.received_size == self.total_size
+    
+    @staticmethod
+    def create(event_id, user_id, filename, total_size):
+        upload_id = uuid.uuid4().hex
+        
+        try:
+            run_write(lambda conn: conn.execute('''
+                INSERT INTO upload_sessions (id, event_id, user_id, filename, total_size)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (upload_id, event_id, user_id, filename, total_size)))
+        except Exception as e:
+            return None
+        
+        os.makedirs(UPLOAD_CHUNK_FOLDER, exist_ok=True)
+        open(os.path.join(UPLOAD_CHUNK_FOLDER, f'{upload_id}.part'), 'wb').close()
+        
+        return UploadSession.find_by_id(upload_id)
+    
+    @staticmethod
+    def find_by_id(upload_id):
+        upload = get_identity(UploadSession, upload_id)
+        if upload:
+            return upload
+        
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('SELECT * FROM upload_sessions WHERE id = ?', (upload_id,))
+        return add_identity(UploadSession, upload_id, UploadSession.from_row(cursor.fetchone()))
+    
+    @staticmethod
+    def delete_expired():
+        conn = get_db()
+        cursor = get_cursor(conn)
+        
+        cursor.execute('''
+            SELECT id FROM upload_sessions
+            WHERE created_at < datetime('now', ?)
+        ''', (f'-{UPLOAD_SESSION_MAX_AGE_HOURS} hours',))
+        
+        for row in cursor.fetchall():
+            UploadSession(id=row['id']).delete()
+    
+    @contextmanager
+    def open_part(self, mode='rb'):
+        with open(self.path, mode) as part_file:
+            if fcntl is not None:
+                fcntl.flock(part_file.fileno(), fcntl.LOCK_EX)
+            else:
+                _part_lock.acquire()
+            try:
+                if os.fstat(part_file.fileno()).st_nlink == 0:
+                    raise FileNotFoundError(self.path)
+                yield part_file
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(part_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    _part_lock.release()
+    
+    def write_chunk(self, offset, stream, chunk_size=64 * 1024):
+        with self.open_part('r+b') as part_file:
+            received_size = os.fstat(part_file.fileno()).st_size
+            if offset != received_size:
+                raise ValueError(f'Deslocamento inválido. O servidor já recebeu {received_size} bytes.')
+            
+            part_file.seek(offset)
+            written = 0
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                if offset + written + len(chunk) > self.total_size:
+                    part_file.truncate(offset)
+                    raise ValueError('O bloco ultrapassa o tamanho declarado do arquivo.')
+                part_file.write(chunk)
+                written += len(chunk)
+            part_file.truncate(offset + written)
+        return offset + written
+    
+    def delete(self):
+        run_write(lambda conn: conn.execute('DELETE FROM upload_sessions WHERE id = ?', (self.id,)))
+        discard_identity(UploadSession, self.id)
+        
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return True
@@ -1,44 +1,35 @@
-from database import get_db, get_cursor
-from werkzeug.security import check_password_hash, generate_password_hash
+from database import get_db, get_cursor, run_write
+from models.base import Model
+from identity_map import get_identity, add_identity
+from passwords import hash_password, verify_password
 import sqlite3
 
-class User:
+class User(Model):
     
-    def __init__(self, id=None, name=None, email=None, password_hash=None, created_at=None):
-        self.id = id
-        self.name = name
-        self.email = email
-        self.password_hash = password_hash
-        self.created_at = created_at
+    _fields = {
+        'id': None,
+        'name': None,
+        'email': None,
+        'password_hash': None,
+        'created_at': None
+    }
+    __slots__ = tuple(_fields)
     
     @staticmethod
     def create(name, email, password):
-        conn = get_db()
-        cursor = get_cursor(conn)
+        password_hash = hash_password(password)
         
-        try:
-            password_hash = generate_password_hash(password)
-            
+        def insert(conn):
+            cursor = get_cursor(conn)
             cursor.execute('''
                 INSERT INTO users (name, email, password_hash)
                 VALUES (?, ?, ?)
             ''', (name, email, password_hash))
-            user_id = cursor.lastrowid
-            
-            conn.commit()
-            
-            cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-            row = cursor.fetchone()
-            
-            if row:
-                return User(
-                    id=row['id'],
-                    name=row['name'],
-                    email=row['email'],
-                    password_hash=row['password_hash'],
-                    created_at=row['created_at']
-                )
-            return None
+            return cursor.lastrowid
+        
+        try:
+            user_id = run_write(insert)
+            return User.find_by_id(user_id)
         except sqlite3.IntegrityError:
             return None
     
@@ -49,49 +40,32 @@ class User:
             cursor = get_cursor(conn)
             
             cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-            row = cursor.fetchone()
-            
-            if row:
-                return User(
-                    id=row['id'],
-                    name=row['name'],
-                    email=row['email'],
-                    password_hash=row['password_hash'],
-                    created_at=row['created_at']
-                )
-            return None
+            return User.from_row(cursor.fetchone())
         except Exception as e:
             raise
     
     @staticmethod
     def find_by_id(user_id):
+        user = get_identity(User, user_id)
+        if user:
+            return user
+        
         conn = get_db()
         cursor = get_cursor(conn)
         
         cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            return User(
-                id=row['id'],
-                name=row['name'],
-                email=row['email'],
-                password_hash=row['password_hash'],
-                created_at=row['created_at']
-            )
-        return None
+        return add_identity(User, user_id, User.from_row(cursor.fetchone()))
     
     def verify_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
     
     def update_password(self, new_password):
-        conn = get_db()
-        cursor = get_cursor(conn)
+        password_hash = hash_password(new_password)
         
-        password_hash = generate_password_hash(new_password)
-        cursor.execute('''
+        run_write(lambda conn: conn.execute('''
             UPDATE users SET password_hash = ? WHERE id = ?
-        ''', (password_hash, self.id))
+        ''', (password_hash, self.id)))
         
-        conn.commit()
+        self.password_hash = password_hash
+        add_identity(User, self.id, self)
         return True
@@ -0,0 +1,29 @@
+import base64
+import json
+
+def encode_cursor(values):
+    payload = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(token, size):
+    if not token:
+        return None
+    
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(payload)
+    except ValueError:
+        return None
+    
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        return None
+    return tuple(values)
+
+def paginate(items, limit, key):
+    if len(items) <= limit:
+        return items, None
+    
+    items = items[:limit]
+    return items, encode_cursor(key(items[-1]))
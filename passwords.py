@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import threading
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY', max(PASSWORD_HASH_WORKERS, 1) * 2))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+PASSWORD_HASH_START_METHOD = os.getenv('PASSWORD_HASH_START_METHOD', 'forkserver')
+
+class PasswordHashingBusy(Exception):
+    pass
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_CONCURRENCY)
+_current_method = None
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context(PASSWORD_HASH_START_METHOD)
+                )
+    return _executor
+
+def _run(func, *args):
+    global _executor
+    
+    if not _slots.acquire(timeout=PASSWORD_HASH_TIMEOUT):
+        raise PasswordHashingBusy('Muitas senhas sendo processadas ao mesmo tempo.')
+    
+    try:
+        if PASSWORD_HASH_WORKERS <= 0:
+            return func(*args)
+        
+        executor = get_executor()
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            with _executor_lock:
+                if _executor is executor:
+                    _executor = None
+            return func(*args)
+    finally:
+        _slots.release()
+
+def hash_password(password):
+    return _run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+def hash_method(password_hash):
+    return (password_hash or '').split('$', 1)[0]
+
+def current_method():
+    global _current_method
+    if _current_method is None:
+        _current_method = hash_method(hash_password(''))
+    return _current_method
+
+def needs_rehash(password_hash):
+    return hash_method(password_hash) != current_method()
+
+def reset_after_fork():
+    global _executor, _executor_lock, _slots
+    _executor = None
+    _executor_lock = threading.Lock()
+    _slots = threading.BoundedSemaphore(PASSWORD_HASH_CONCURRENCY)
+
+def shutdown(wait=True):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+import tasks
+from database import get_cursor, write_transaction
+from listing_cache import invalidate_listings
+
+POPULARITY_HALF_LIFE_DAYS = float(os.getenv('POPULARITY_HALF_LIFE_DAYS', 0))
+POPULARITY_REFRESH_SECONDS = int(os.getenv('POPULARITY_REFRESH_SECONDS', 3600))
+
+_last_refresh = 0
+_refresh_lock = threading.Lock()
+
+def refresh_popularity():
+    updated = _refresh_popularity_scores()
+    if updated:
+        invalidate_listings()
+    return updated
+
+def _refresh_popularity_scores():
+    with write_transaction() as conn:
+        cursor = get_cursor(conn)
+        
+        if POPULARITY_HALF_LIFE_DAYS > 0:
+            cursor.execute('''
+                UPDATE event_popularity
+                SET decay_factor = :half_life / (:half_life + MAX(julianday('now') - julianday(event_date), 0)),
+                    score = raw_score * :half_life / (:half_life + MAX(julianday('now') - julianday(event_date), 0))
+            ''', {'half_life': POPULARITY_HALF_LIFE_DAYS})
+        else:
+            cursor.execute('''
+                UPDATE event_popularity SET decay_factor = 1, score = raw_score
+                WHERE decay_factor != 1 OR score != raw_score
+            ''')
+        
+        return cursor.rowcount
+
+def schedule_popularity_refresh():
+    global _last_refresh
+    
+    if POPULARITY_HALF_LIFE_DAYS <= 0:
+        return None
+    
+    with _refresh_lock:
+        now = time.monotonic()
+        if _last_refresh and now - _last_refresh < POPULARITY_REFRESH_SECONDS:
+            return None
+        _last_refresh = now
+    
+    return tasks.submit(refresh_popularity)
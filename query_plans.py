@@ -0,0 +1,383 @@
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+import database
+from database import get_db, get_cursor, write_transaction, init_db, rebuild_stats
+
+DATASET_SIZES = {
+    'users': 2000,
+    'events': 20000,
+    'photos': 100000,
+    'comments': 40000,
+    'likes': 40000,
+    'follows': 10000,
+    'participants': 10000
+}
+
+ORDERED_INDEX_SCANS = ('idx_event_popularity_score',)
+STATEMENT_PREFIXES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+FTS_SHADOW_TABLE = re.compile(r'_fts_(config|data|idx|docsize|content)\b')
+WRITE_STATEMENT = re.compile(
+    r'^\s*(?:(INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO|(UPDATE)(?:\s+OR\s+\w+)?|(DELETE)\s+FROM)\s+(\w+)',
+    re.IGNORECASE
+)
+TRIGGER_EVENT = re.compile(r'\b(INSERT|UPDATE|DELETE)\b(?:\s+OF\s+[\w\s,]+?)?\s+ON\s+\w+', re.IGNORECASE)
+TRIGGER_ROW_VALUE = re.compile(r'\b(?:NEW|OLD)\.\w+', re.IGNORECASE)
+
+def seed_dataset(sizes, seed=0):
+    rng = random.Random(seed)
+    users = range(1, sizes['users'] + 1)
+    events = range(1, sizes['events'] + 1)
+    
+    with write_transaction() as conn:
+        cursor = get_cursor(conn)
+        
+        cursor.executemany(
+            'INSERT INTO users (id, name, email, password_hash) VALUES (?, ?, ?, ?)',
+            ((i, f'Usuário {i}', f'usuario{i}@example.com', 'x') for i in users)
+        )
+        cursor.executemany('''
+            INSERT INTO events (id, user_id, title, description, location, date, visibility)
+            VALUES (?, ?, ?, ?, ?, date('2020-01-01', ?), ?)
+        ''', (
+            (i, rng.choice(users), f'Evento {i}', 'Descrição', 'Local',
+             f'+{rng.randrange(2000)} days', 'public' if rng.random() < 0.6 else 'private')
+            for i in events
+        ))
+        cursor.executemany('''
+            INSERT INTO photos (event_id, user_id, filename, binary_data, size, sha256)
+            VALUES (?, ?, ?, ?, 1, ?)
+        ''', (
+            (rng.choice(events), rng.choice(users), f'foto{i}.jpg', b'\xff', f'{i:064x}')
+            for i in range(sizes['photos'])
+        ))
+        cursor.executemany(
+            'INSERT INTO comments (event_id, user_id, content) VALUES (?, ?, ?)',
+            ((rng.choice(events), rng.choice(users), 'Comentário') for _ in range(sizes['comments']))
+        )
+        cursor.executemany(
+            'INSERT OR IGNORE INTO likes (event_id, user_id) VALUES (?, ?)',
+            ((rng.choice(events), rng.choice(users)) for _ in range(sizes['likes']))
+        )
+        cursor.executemany(
+            'INSERT OR IGNORE INTO user_follows (follower_id, following_id) VALUES (?, ?)',
+            ((a, b) for a, b in ((rng.choice(users), rng.choice(users)) for _ in range(sizes['follows'])) if a != b)
+        )
+        cursor.executemany(
+            'INSERT OR IGNORE INTO event_participants (event_id, user_id) VALUES (?, ?)',
+            ((rng.choice(events), rng.choice(users)) for _ in range(sizes['participants']))
+        )
+        cursor.executemany(
+            'INSERT INTO photo_thumbnails (photo_id, binary_data, width, height) VALUES (?, ?, 1, 1)',
+            ((i, b'\xff') for i in range(1, sizes['photos'] // 2))
+        )
+        cursor.execute('''
+            INSERT INTO upload_sessions (id, event_id, user_id, filename, total_size)
+            VALUES ('sessao', 1, 1, 'foto.jpg', 1)
+        ''')
+        cursor.execute('''
+            INSERT INTO upload_sessions (id, event_id, user_id, filename, total_size, created_at)
+            VALUES ('sessao_expirada', 1, 1, 'foto.jpg', 1, datetime('now', '-7 days'))
+        ''')
+    
+    rebuild_stats()
+
+def query_scenarios():
+    from models import User, Event, Photo, Thumbnail, UploadSession, Follow, Like, Comment
+    from database import call_procedure_get_event_stats, call_procedure_get_user_activity
+    from pagination import encode_cursor
+    
+    def deep_cursor(events):
+        return encode_cursor(Event.page_key(events[-1])) if events else None
+    
+    public_events = Event.find_public_events(limit=500)
+    user_events = Event.find_by_user(1, limit=500)
+    feed_events = Event.find_feed(1, limit=100)
+    feed_cursor = encode_cursor(Event.feed_key(feed_events[-1])) if feed_events else None
+    comments = Comment.find_by_event(1, limit=10)
+    comments_cursor = encode_cursor(Comment.page_key(comments[-1])) if comments else None
+    
+    return [
+        ('User.find_by_email', lambda: User.find_by_email('usuario1@example.com')),
+        ('User.find_by_id', lambda: User.find_by_id(1)),
+        ('Event.find_by_id', lambda: Event.find_by_id(1)),
+        ('Event.find_by_user', lambda: Event.find_by_user(1, limit=21)),
+        ('Event.find_by_user (sem limite)', lambda: Event.find_by_user(1)),
+        ('Event.find_by_user (página profunda)', lambda: Event.find_by_user(1, limit=21, after=deep_cursor(user_events))),
+        ('Event.find_public_events', lambda: Event.find_public_events(limit=21)),
+        ('Event.find_public_events (página profunda)', lambda: Event.find_public_events(limit=21, after=deep_cursor(public_events))),
+        ('Event.find_photos_version', lambda: Event.find_photos_version(1)),
+        ('Event.find_popular_events', lambda: Event.find_popular_events(limit=5)),
+        ('Event.find_feed', lambda: Event.find_feed(1, limit=21)),
+        ('Event.find_feed (página profunda)', lambda: Event.find_feed(1, limit=21, after=feed_cursor)),
+        ('Follow.find', lambda: Follow.find(1, 2)),
+        ('Like.exists', lambda: Like.exists(1, 2)),
+        ('Comment.find_by_id', lambda: Comment.find_by_id(1)),
+        ('Comment.find_by_event', lambda: Comment.find_by_event(1, limit=21)),
+        ('Comment.find_by_event (página seguinte)', lambda: Comment.find_by_event(1, limit=21, after=comments_cursor)),
+        ('Photo.find_by_id', lambda: Photo.find_by_id(1)),
+        ('Photo.find_by_event', lambda: Photo.find_by_event(1)),
+        ('Photo.find_metadata_by_id', lambda: Photo.find_metadata_by_id(1)),
+        ('Photo.find_metadata_by_event', lambda: Photo.find_metadata_by_event(1)),
+        ('Thumbnail.find_by_photo_id', lambda: Thumbnail.find_by_photo_id(1)),
+        ('Thumbnail.find_missing_photo_ids', lambda: Thumbnail.find_missing_photo_ids(0, 100)),
+        ('UploadSession.find_by_id', lambda: UploadSession.find_by_id('sessao')),
+        ('call_procedure_get_event_stats', lambda: call_procedure_get_event_stats(1)),
+        ('call_procedure_get_user_activity', lambda: call_procedure_get_user_activity(1)),
+        ('Event.search', lambda: Event.search('evento', user_id=1, limit=21), {'USE TEMP B-TREE FOR ORDER BY'})
+    ]
+
+def sample(model, sql, count):
+    cursor = get_cursor(get_db())
+    cursor.execute(sql, (count,))
+    return iter(model.from_rows(cursor.fetchall()))
+
+def sample_ids(sql, count):
+    cursor = get_cursor(get_db())
+    cursor.execute(sql, (count,))
+    return iter([row[0] for row in cursor.fetchall()])
+
+def write_scenarios(repeat):
+    from models import User, Event, Photo, Thumbnail, UploadSession, Follow, Like, Comment
+    from storage import get_filesystem_storage, migrate_database_photos
+    
+    count = repeat + 1
+    emails = (f'novo{i}@example.com' for i in itertools.count())
+    user = User.find_by_id(1)
+    event = Event.find_by_id(2)
+    new_followers = sample_ids('''
+        SELECT id FROM users
+        WHERE id != 1 AND id NOT IN (SELECT follower_id FROM user_follows WHERE following_id = 1)
+        ORDER BY id LIMIT ?
+    ''', count)
+    new_likers = sample_ids('''
+        SELECT id FROM users
+        WHERE id NOT IN (SELECT user_id FROM likes WHERE event_id = 1)
+        ORDER BY id LIMIT ?
+    ''', count)
+    comments = sample(Comment, 'SELECT * FROM comments ORDER BY id LIMIT ?', count)
+    photos = sample(Photo, 'SELECT id, event_id, storage FROM photos ORDER BY id LIMIT ?', count)
+    follows = sample(Follow, 'SELECT * FROM user_follows ORDER BY id LIMIT ?', count)
+    events = sample(Event, 'SELECT * FROM events ORDER BY id DESC LIMIT ?', count)
+    
+    def toggle_visibility():
+        visibility = 'private' if event.visibility == 'public' else 'public'
+        return event.update(event.title, event.description, event.location, event.date, visibility)
+    
+    return [
+        ('Like.delete_by_user', lambda: Like.delete_by_user(1, 2)),
+        ('UploadSession.delete_expired', UploadSession.delete_expired),
+        ('FileSystemStorage.collect_garbage', lambda: get_filesystem_storage().collect_garbage()),
+        ('migrate_database_photos', lambda: migrate_database_photos(batch_size=50)),
+        ('User.create', lambda: User.create('Usuário novo', next(emails), 'senha123')),
+        ('User.update_password', lambda: user.update_password('senha456')),
+        ('Event.create', lambda: Event.create(1, 'Evento novo', 'Descrição', 'Local', '2024-01-01', 'public')),
+        ('Event.update', toggle_visibility),
+        ('Photo.create_many', lambda: Photo.create_many(1, 1, [('nova.jpg', os.urandom(64), 'image/jpeg')])),
+        ('Thumbnail.save', lambda: Thumbnail.save(1, b'\xff', 1, 1)),
+        ('Comment.create', lambda: Comment.create(1, 1, 'Comentário novo')),
+        ('Follow.create', lambda: Follow.create(next(new_followers), 1)),
+        ('Like.create', lambda: Like.create(1, next(new_likers))),
+        ('UploadSession.create', lambda: UploadSession.create(1, 1, 'foto.jpg', 1)),
+        ('Comment.delete', lambda: next(comments).delete()),
+        ('Photo.delete', lambda: next(photos).delete()),
+        ('Follow.delete', lambda: next(follows).delete()),
+        ('Event.delete', lambda: next(events).delete())
+    ]
+
+def prepare_write_scenarios():
+    with write_transaction() as conn:
+        cursor = get_cursor(conn)
+        cursor.execute('''
+            UPDATE photos SET storage = 'filesystem', binary_data = NULL
+            WHERE id > 200
+        ''')
+        cursor.executemany(
+            'INSERT INTO photo_blobs (sha256, size, ref_count) VALUES (?, 1, 0)',
+            ((f'{i:064x}',) for i in range(200, 300))
+        )
+
+def capture_statements(func):
+    connections = [get_db()]
+    with write_transaction() as conn:
+        connections.append(conn)
+    
+    statements = []
+    for conn in connections:
+        conn.set_trace_callback(statements.append)
+    try:
+        func()
+    finally:
+        for conn in connections:
+            conn.set_trace_callback(None)
+    return list(dict.fromkeys(
+        sql for sql in statements
+        if sql.lstrip().upper().startswith(STATEMENT_PREFIXES) and not FTS_SHADOW_TABLE.search(sql)
+    ))
+
+def written_tables(statements):
+    tables = set()
+    for sql in statements:
+        match = WRITE_STATEMENT.match(sql)
+        if match:
+            action = 'INSERT' if match.group(1) else (match.group(2) or match.group(3)).upper()
+            tables.add((match.group(4), action))
+    return tables
+
+def triggered_statements(table, action):
+    cursor = get_cursor(get_db())
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,))
+    
+    statements = []
+    for row in cursor.fetchall():
+        header, body = re.split(r'\bBEGIN\b', row['sql'], maxsplit=1, flags=re.IGNORECASE)
+        event = TRIGGER_EVENT.search(header)
+        if not event or event.group(1).upper() != action:
+            continue
+        body = re.sub(r'\bEND\s*$', '', body.strip(), flags=re.IGNORECASE)
+        for sql in body.split(';'):
+            if sql.strip():
+                statements.append((f"trigger {row['name']}", TRIGGER_ROW_VALUE.sub('?', sql.strip())))
+    return statements
+
+def cascaded_statements(table):
+    cursor = get_cursor(get_db())
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+    
+    statements = []
+    for child in [row['name'] for row in cursor.fetchall()]:
+        cursor.execute(f'PRAGMA foreign_key_list({child})')
+        for key in cursor.fetchall():
+            if key['table'] != table:
+                continue
+            origin = f"chave estrangeira {child}.{key['from']} -> {table}"
+            if key['on_delete'] == 'CASCADE':
+                statements.append((origin, f"DELETE FROM {child} WHERE {key['from']} = ?"))
+            else:
+                statements.append((origin, f"SELECT 1 FROM {child} WHERE {key['from']} = ?"))
+    return statements
+
+def implied_statements(statements):
+    pending = list(written_tables(statements))
+    seen = set(pending)
+    implied = []
+    
+    while pending:
+        table, action = pending.pop(0)
+        found = triggered_statements(table, action)
+        if action == 'DELETE':
+            found += cascaded_statements(table)
+        
+        for origin, sql in found:
+            implied.append((origin, sql))
+            for written in written_tables([sql]) - seen:
+                seen.add(written)
+                pending.append(written)
+    
+    return implied
+
+def explain(sql):
+    cursor = get_cursor(get_db())
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql, [None] * sql.count('?'))
+    return [row['detail'] for row in cursor.fetchall()]
+
+def plan_problems(plan, allowed=()):
+    problems = []
+    for detail in plan:
+        if detail in allowed or ' VIRTUAL TABLE INDEX ' in detail:
+            continue
+        if detail.startswith('SCAN ') and not detail.endswith(tuple(f'INDEX {name}' for name in ORDERED_INDEX_SCANS)):
+            problems.append(detail)
+        elif 'USE TEMP B-TREE' in detail:
+            problems.append(detail)
+    return problems
+
+def time_query(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def run_scenario(name, func, allowed, repeat):
+    statements = capture_statements(func)
+    plans = [(None, sql, explain(sql)) for sql in statements]
+    plans += [(origin, sql, explain(sql)) for origin, sql in implied_statements(statements)]
+    return {
+        'query': name,
+        'statements': [
+            {'sql': ' '.join(sql.split()), 'origin': origin, 'plan': plan, 'problems': plan_problems(plan, allowed)}
+            for origin, sql, plan in plans
+        ],
+        'median_ms': round(time_query(func, repeat), 3)
+    }
+
+def check_query_plans(sizes=DATASET_SIZES, repeat=5):
+    import archive
+    import listing_cache
+    import storage
+    import models.upload_session as upload_session
+    
+    original_path = database.DB_PATH
+    original_storage_path = storage.PHOTO_STORAGE_PATH
+    original_chunk_folder = upload_session.UPLOAD_CHUNK_FOLDER
+    original_archive_folder = archive.ARCHIVE_CACHE_FOLDER
+    original_generation_file = listing_cache.LISTING_CACHE_GENERATION_FILE
+    
+    with tempfile.TemporaryDirectory() as directory:
+        database.use_database(os.path.join(directory, 'query_plans.db'))
+        storage.PHOTO_STORAGE_PATH = os.path.join(directory, 'photos')
+        upload_session.UPLOAD_CHUNK_FOLDER = os.path.join(directory, 'chunks')
+        archive.ARCHIVE_CACHE_FOLDER = os.path.join(directory, 'archives')
+        listing_cache.LISTING_CACHE_GENERATION_FILE = os.path.join(directory, 'listings.generation')
+        try:
+            init_db()
+            seed_dataset(sizes)
+            
+            results = []
+            for name, func, *allowed in query_scenarios():
+                results.append(run_scenario(name, func, allowed[0] if allowed else (), repeat))
+            
+            prepare_write_scenarios()
+            for name, func, *allowed in write_scenarios(repeat):
+                results.append(run_scenario(name, func, allowed[0] if allowed else (), repeat))
+        finally:
+            database.use_database(original_path)
+            storage.PHOTO_STORAGE_PATH = original_storage_path
+            upload_session.UPLOAD_CHUNK_FOLDER = original_chunk_folder
+            archive.ARCHIVE_CACHE_FOLDER = original_archive_folder
+            listing_cache.LISTING_CACHE_GENERATION_FILE = original_generation_file
+    
+    return {
+        'sqlite_version': sqlite3.sqlite_version,
+        'python_version': platform.python_version(),
+        'dataset': dict(sizes),
+        'queries': results
+    }
+
+def compare_timings(report, baseline, tolerance):
+    previous = {query['query']: query['median_ms'] for query in baseline.get('queries', [])}
+    regressions = []
+    
+    for query in report['queries']:
+        before = previous.get(query['query'])
+        if before is not None and query['median_ms'] > max(before * tolerance, before + 1):
+            regressions.append((query['query'], before, query['median_ms']))
+    
+    return regressions
+
+def load_report(path):
+    with open(path, encoding='utf-8') as report_file:
+        return json.load(report_file)
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+SERVER_BIND = os.getenv('SERVER_BIND', '0.0.0.0:5001')
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', multiprocessing.cpu_count()))
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', 4))
+SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', 30))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))
+SERVER_KEEPALIVE = int(os.getenv('SERVER_KEEPALIVE', 5))
+SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', 0))
+
+def pre_fork(server, worker):
+    import database
+    database.close_all_connections()
+
+def post_fork(server, worker):
+    import database
+    import passwords
+    import tasks
+    
+    database.reset_after_fork()
+    tasks.reset_after_fork()
+    passwords.reset_after_fork()
+    server.log.info('Worker %s pronto', worker.pid)
+
+def worker_exit(server, worker):
+    import database
+    import passwords
+    import tasks
+    
+    tasks.shutdown(wait=True)
+    passwords.shutdown(wait=False)
+    database.close_all_connections()
+
+def worker_abort(worker):
+    worker.log.warning('Worker %s interrompido após %ss sem responder', worker.pid, SERVER_TIMEOUT)
+
+def server_options():
+    return {
+        'bind': SERVER_BIND,
+        'workers': SERVER_WORKERS,
+        'threads': SERVER_THREADS,
+        'worker_class': 'gthread',
+        'timeout': SERVER_TIMEOUT,
+        'graceful_timeout': SERVER_GRACEFUL_TIMEOUT,
+        'keepalive': SERVER_KEEPALIVE,
+        'max_requests': SERVER_MAX_REQUESTS,
+        'max_requests_jitter': SERVER_MAX_REQUESTS // 10,
+        'preload_app': True,
+        'pre_fork': pre_fork,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+        'worker_abort': worker_abort,
+        'accesslog': os.getenv('SERVER_ACCESS_LOG', '-'),
+        'errorlog': '-'
+    }
+
+class MemoServer(BaseApplication or object):
+    
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+    
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+    
+    def load(self):
+        return self.application
+
+def main():
+    if BaseApplication is None:
+        raise SystemExit('O servidor de produção requer o gunicorn: pip install gunicorn')
+    
+    if not os.getenv('SECRET_KEY'):
+        print('Aviso: SECRET_KEY não definida; usando a chave padrão de desenvolvimento.')
+    
+    from database import init_db
+    from app import app
+    
+    init_db()
+    
+    print(f'Servidor iniciado em http://{SERVER_BIND} ({SERVER_WORKERS} processo(s) x {SERVER_THREADS} thread(s))')
+    MemoServer(app, server_options()).run()
+
+if __name__ == '__main__':
+    main()
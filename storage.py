@@ -0,0 +1,160 @@
+import hashlib
+import os
+import tempfile
+from database import get_db, get_cursor, write_transaction
+
+PHOTO_STORAGE = os.getenv('PHOTO_STORAGE', 'database')
+PHOTO_STORAGE_PATH = os.getenv(
+    'PHOTO_STORAGE_PATH',
+    os.path.join(os.getenv('UPLOAD_FOLDER', 'uploads'), 'photos')
+)
+
+class DatabaseStorage:
+    
+    name = 'database'
+    
+    def prepare(self, sha256, binary_data):
+        pass
+    
+    def store(self, cursor, sha256, binary_data):
+        return binary_data
+    
+    def discard_unreferenced(self, sha256s):
+        return 0
+
+class FileSystemStorage:
+    
+    name = 'filesystem'
+    
+    def __init__(self, root):
+        self.root = root
+    
+    def path_for(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+    
+    def prepare(self, sha256, binary_data):
+        path = self.path_for(sha256)
+        if os.path.exists(path):
+            return
+        
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(binary_data)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def store(self, cursor, sha256, binary_data):
+        cursor.execute('''
+            INSERT INTO photo_blobs (sha256, size, ref_count)
+            VALUES (?, ?, 1)
+            ON CONFLICT(sha256) DO UPDATE SET ref_count = ref_count + 1
+        ''', (sha256, len(binary_data)))
+        
+        # collect_garbage pode ter removido o arquivo antes desta transação.
+        self.prepare(sha256, binary_data)
+        return None
+    
+    def discard_unreferenced(self, sha256s):
+        removed = 0
+        with write_transaction() as conn:
+            cursor = get_cursor(conn)
+            for sha256 in set(sha256s):
+                cursor.execute('SELECT 1 FROM photo_blobs WHERE sha256 = ?', (sha256,))
+                path = self.path_for(sha256)
+                if cursor.fetchone() is None and os.path.exists(path):
+                    os.remove(path)
+                    removed += 1
+        return removed
+    
+    def read(self, sha256):
+        with open(self.path_for(sha256), 'rb') as photo_file:
+            return photo_file.read()
+    
+    def collect_garbage(self):
+        cursor = get_cursor(get_db())
+        cursor.execute('SELECT sha256 FROM photo_blobs WHERE ref_count <= 0')
+        candidates = [row['sha256'] for row in cursor.fetchall()]
+        
+        if not candidates:
+            return 0
+        
+        removed = 0
+        with write_transaction() as conn:
+            cursor = get_cursor(conn)
+            for sha256 in candidates:
+                cursor.execute('DELETE FROM photo_blobs WHERE sha256 = ? AND ref_count <= 0', (sha256,))
+                if cursor.rowcount:
+                    path = self.path_for(sha256)
+                    if os.path.exists(path):
+                        os.remove(path)
+                    removed += 1
+        
+        return removed
+
+def get_filesystem_storage():
+    return FileSystemStorage(PHOTO_STORAGE_PATH)
+
+def get_photo_storage():
+    if PHOTO_STORAGE == FileSystemStorage.name:
+        return get_filesystem_storage()
+    return DatabaseStorage()
+
+def migrate_database_photos(batch_size=50):
+    storage = get_filesystem_storage()
+    conn = get_db()
+    cursor = get_cursor(conn)
+    
+    migrated = 0
+    last_id = 0
+    
+    while True:
+        cursor.execute('''
+            SELECT id FROM photos
+            WHERE storage = 'database' AND binary_data IS NOT NULL AND id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, batch_size))
+        photo_ids = [row['id'] for row in cursor.fetchall()]
+        
+        if not photo_ids:
+            break
+        
+        photos = []
+        for photo_id in photo_ids:
+            cursor.execute('SELECT binary_data, sha256 FROM photos WHERE id = ?', (photo_id,))
+            row = cursor.fetchone()
+            if not row or row['binary_data'] is None:
+                continue
+            
+            binary_data = bytes(row['binary_data'])
+            sha256 = row['sha256'] or hashlib.sha256(binary_data).hexdigest()
+            storage.prepare(sha256, binary_data)
+            photos.append((photo_id, sha256, binary_data))
+        
+        with write_transaction() as write_conn:
+            write_cursor = get_cursor(write_conn)
+            
+            for photo_id, sha256, binary_data in photos:
+                write_cursor.execute('''
+                    UPDATE photos
+                    SET binary_data = NULL, sha256 = ?, size = ?, storage = ?
+                    WHERE id = ? AND storage = 'database' AND binary_data IS NOT NULL
+                ''', (sha256, len(binary_data), storage.name, photo_id))
+                
+                if write_cursor.rowcount:
+                    storage.store(write_cursor, sha256, binary_data)
+                    migrated += 1
+        
+        storage.discard_unreferenced(sha256 for _, sha256, _ in photos)
+        
+        last_id = photo_ids[-1]
+    
+    return migrated
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+from database import close_db
+
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=BACKGROUND_WORKERS,
+                    thread_name_prefix='memo-background'
+                )
+    return _executor
+
+def submit(func, *args, **kwargs):
+    def run():
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            logger.exception('Erro na tarefa em segundo plano %s', getattr(func, '__name__', func))
+            raise
+        finally:
+            close_db()
+    
+    return get_executor().submit(run)
+
+def reset_after_fork():
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+def shutdown(wait=True):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
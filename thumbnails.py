@@ -0,0 +1,108 @@
+import io
+import logging
+import os
+import threading
+import tasks
+from models.photo import Photo
+from models.thumbnail import Thumbnail
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+THUMBNAIL_SIZE = int(os.getenv('THUMBNAIL_SIZE', 400))
+THUMBNAIL_QUALITY = int(os.getenv('THUMBNAIL_QUALITY', 80))
+
+logger = logging.getLogger(__name__)
+
+_scheduled = set()
+_scheduled_lock = threading.Lock()
+
+def is_available():
+    return Image is not None
+
+def render_thumbnail(binary_data):
+    with Image.open(io.BytesIO(binary_data)) as image:
+        image.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        image = ImageOps.exif_transpose(image)
+        
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+        return output.getvalue(), image.width, image.height
+
+def generate_thumbnail(photo_id):
+    if not is_available():
+        return False
+    
+    photo = Photo.find_metadata_by_id(photo_id)
+    if not photo:
+        return False
+    
+    binary_data = photo.load_binary_data()
+    if not binary_data:
+        return False
+    
+    try:
+        thumbnail_data, width, height = render_thumbnail(binary_data)
+    except Exception:
+        logger.warning('Não foi possível gerar a miniatura da foto %s', photo_id, exc_info=True)
+        return False
+    
+    return Thumbnail.save(photo_id, thumbnail_data, width, height)
+
+def generate_thumbnails(photo_ids):
+    generated = 0
+    for photo_id in photo_ids:
+        if generate_thumbnail(photo_id):
+            generated += 1
+    return generated
+
+def _generate_scheduled(photo_ids):
+    try:
+        return generate_thumbnails(photo_ids)
+    finally:
+        with _scheduled_lock:
+            _scheduled.difference_update(photo_ids)
+
+def schedule_thumbnails(photo_ids):
+    if not is_available():
+        return None
+    
+    with _scheduled_lock:
+        photo_ids = [photo_id for photo_id in dict.fromkeys(photo_ids) if photo_id not in _scheduled]
+        _scheduled.update(photo_ids)
+    
+    if not photo_ids:
+        return None
+    
+    try:
+        return tasks.submit(_generate_scheduled, photo_ids)
+    except Exception:
+        with _scheduled_lock:
+            _scheduled.difference_update(photo_ids)
+        raise
+
+def backfill_thumbnails(batch_size=100):
+    generated = 0
+    last_id = 0
+    
+    while True:
+        photo_ids = Thumbnail.find_missing_photo_ids(last_id, batch_size)
+        if not photo_ids:
+            break
+        generated += generate_thumbnails(photo_ids)
+        last_id = photo_ids[-1]
+    
+    return generated